@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Categorías de códigos CUPS compartidas por parse-cups-pdf.py y parse-cups-simple.py.
+
+La tabla se define en cups_categories.json: rangos de códigos [inicio, fin, categoría]
+(inclusivos, sin solaparse), una categoría por defecto y categorías para códigos
+puntuales (overrides, para los casos especiales). Ambos scripts usan la misma
+tabla, así un código recibe la misma categoría sin importar qué parser lo leyó.
+La búsqueda es bisect sobre los límites de rango ordenados.
+
+Etiquetas unificadas respecto a las tablas anteriores de cada script (las de
+la migración de cups y de import-all-cups-from-csv.ts):
+- parse-cups-simple.py: "Procedimientos Quirúrgicos" (870000-879999) pasa a
+  "Procedimientos" y la categoría por defecto "Otros Servicios" pasa a "Otros".
+- parse-cups-pdf.py: los códigos 230000-239999 pasan de "Otros" a "Radiología".
+"""
+
+import json
+import os
+from bisect import bisect_right
+
+CATEGORIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cups_categories.json')
+
+class CategoryTable:
+    """Tabla de categorías: rangos ordenados, categoría por defecto y códigos puntuales"""
+
+    def __init__(self, ranges, default, overrides=None):
+        ranges = sorted((int(start), int(end), label) for start, end, label in ranges)
+        for (start, end, label), (next_start, _, next_label) in zip(ranges, ranges[1:]):
+            if next_start <= end:
+                raise ValueError(f"Rangos solapados: {label} ({start}-{end}) y {next_label} (desde {next_start})")
+        for start, end, label in ranges:
+            if start > end:
+                raise ValueError(f"Rango inválido para {label}: {start}-{end}")
+
+        # Límites de segmento: segment_labels[i] aplica desde boundaries[i - 1]
+        # hasta antes de boundaries[i]; los huecos entre rangos llevan la categoría
+        # por defecto, así cada búsqueda es un solo bisect.
+        self.boundaries = []
+        self.segment_labels = [default]
+        for start, end, label in ranges:
+            if self.boundaries and self.boundaries[-1] == start:
+                self.segment_labels[-1] = label
+            else:
+                self.boundaries.append(start)
+                self.segment_labels.append(label)
+            self.boundaries.append(end + 1)
+            self.segment_labels.append(default)
+
+        self.default = default
+        self.overrides = dict(overrides or {})
+
+    def classify(self, code):
+        """Categoría de un código CUPS"""
+        override = self.overrides.get(code)
+        if override is not None:
+            return override
+        return self.segment_labels[bisect_right(self.boundaries, int(code))]
+
+    def classify_many(self, codes):
+        """Categorías de una lista de códigos (un bisect por código, como classify)"""
+        if self.overrides:
+            return [self.classify(code) for code in codes]
+        boundaries = self.boundaries
+        segment_labels = self.segment_labels
+        return [segment_labels[bisect_right(boundaries, int(code))] for code in codes]
+
+def load_category_table(path=CATEGORIES_FILE):
+    """Cargar la tabla de categorías del archivo de configuración"""
+    with open(path, 'r', encoding='utf-8') as f:
+        table = json.load(f)
+    return CategoryTable(table['ranges'], table['default'], table.get('overrides'))
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tokenizador compartido del texto extraído del PDF de códigos CUPS.
+
+Máquina de estados de una sola pasada sobre un iterador de líneas (por ejemplo,
+el archivo abierto): no carga el texto completo ni recorre una lista por índice.
+Cada registro se entrega con las partes del nombre, el precio (o None) y el motivo
+por el que terminó, para que cada script aplique sus propias reglas.
+
+La entrada puede ser el texto de pdftotext o el PDF directamente: con pypdf
+(pip install pypdf) las páginas se extraen en paralelo y se unen en orden.
+"""
+
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+# Línea de precio: solo dígitos
+PRICE_LINE = re.compile(r'^\d+$')
+# Una línea que empieza con 6 dígitos inicia otro registro
+CODE_START = re.compile(r'^\d{6}')
+# Línea de código de parse-cups-pdf.py (el nombre puede estar vacío o pegado al código)
+CODE_LINE_PDF = re.compile(r'^(\d{6})\s*(.*)')
+# Línea de código de parse-cups-simple.py (código, espacio y nombre)
+CODE_LINE_SIMPLE = re.compile(r'^(\d{6})\s+(.+)$')
+
+# Motivos de fin de registro
+END_PRICE = 'precio'          # Se encontró la línea de precio (consumida)
+END_NEXT_CODE = 'otro código'  # Empezó otro registro antes del precio
+END_LIMIT = 'límite'          # Se superó el máximo de partes del nombre
+END_EOF = 'fin de archivo'    # El archivo terminó antes del precio
+
+RawCupsRecord = namedtuple('RawCupsRecord', ['code', 'name_parts', 'price', 'end'])
+
+# Estados
+SEEKING_CODE = 0
+READING_NAME = 1
+
+class CupsTokenizer:
+    """
+    Tokenizador configurable:
+    - code_line: expresión con grupos (código, primera parte del nombre)
+    - header_substrings: textos (en minúsculas) que marcan una línea de encabezado
+    - header_lines: líneas exactas de encabezado
+    - max_name_parts: máximo de partes del nombre antes de cerrar el registro (None = sin límite)
+    Los encabezados solo se descartan mientras se busca un código; dentro de un
+    nombre cualquier línea que no sea precio ni código es parte del nombre.
+    """
+
+    def __init__(self, code_line, header_substrings=(), header_lines=(), max_name_parts=None):
+        self.code_line = code_line
+        self.header_substrings = tuple(header_substrings)
+        self.header_lines = frozenset(header_lines)
+        self.max_name_parts = max_name_parts
+
+    def is_header(self, line):
+        if line in self.header_lines:
+            return True
+        lowered = line.lower()
+        return any(marker in lowered for marker in self.header_substrings)
+
+    def records(self, lines):
+        """Generar un RawCupsRecord por registro, en el orden del texto"""
+        state = SEEKING_CODE
+        code = None
+        name_parts = None
+
+        for raw_line in lines:
+            line = raw_line.strip()
+
+            if state == READING_NAME:
+                if not line:
+                    continue
+                if PRICE_LINE.match(line):
+                    yield RawCupsRecord(code, name_parts, line, END_PRICE)
+                    state = SEEKING_CODE
+                    continue
+                if CODE_START.match(line):
+                    # La misma línea se vuelve a evaluar como inicio de registro
+                    yield RawCupsRecord(code, name_parts, None, END_NEXT_CODE)
+                    state = SEEKING_CODE
+                else:
+                    name_parts.append(line)
+                    if self.max_name_parts is not None and len(name_parts) > self.max_name_parts:
+                        yield RawCupsRecord(code, name_parts, None, END_LIMIT)
+                        state = SEEKING_CODE
+                    continue
+
+            # SEEKING_CODE
+            if not line or self.is_header(line):
+                continue
+            match = self.code_line.match(line)
+            if match:
+                code = match.group(1)
+                name_parts = [match.group(2)] if match.group(2) else []
+                state = READING_NAME
+
+        if state == READING_NAME:
+            yield RawCupsRecord(code, name_parts, None, END_EOF)
+
+# Configuraciones de cada script
+PDF_TOKENIZER = CupsTokenizer(CODE_LINE_PDF, header_substrings=('codigo cups', 'nombrecups'),
+                              header_lines=('Monto',), max_name_parts=10)
+SIMPLE_TOKENIZER = CupsTokenizer(CODE_LINE_SIMPLE, header_substrings=('codigo cups',),
+                                 header_lines=('Monto',))
+
+# Páginas por tarea al extraer el PDF en paralelo
+PAGES_PER_TASK = 16
+
+def require_pypdf():
+    """Importar pypdf solo cuando se lee un PDF directamente"""
+    try:
+        import pypdf
+        return pypdf
+    except ImportError:
+        raise RuntimeError("La lectura directa del PDF requiere pypdf: pip install pypdf")
+
+# PdfReader de cada proceso del pool (se abre una vez por proceso)
+_worker_reader = None
+
+def _open_worker_reader(pdf_path):
+    global _worker_reader
+    _worker_reader = require_pypdf().PdfReader(pdf_path)
+
+def _extract_page_range(page_range):
+    start, stop = page_range
+    return [_worker_reader.pages[n].extract_text() or '' for n in range(start, stop)]
+
+def pdf_page_texts(pdf_path, workers=None, pages_per_task=PAGES_PER_TASK):
+    """Generar el texto de cada página del PDF, en orden, extrayendo por bloques en un pool de procesos"""
+    reader = require_pypdf().PdfReader(pdf_path)
+    page_count = len(reader.pages)
+    workers = workers or os.cpu_count() or 1
+    ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+
+    if workers <= 1 or len(ranges) <= 1:
+        for page in reader.pages:
+            yield page.extract_text() or ''
+        return
+
+    del reader
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), initializer=_open_worker_reader,
+                             initargs=(pdf_path,)) as pool:
+        # map() entrega los bloques en el orden de las páginas
+        for texts in pool.map(_extract_page_range, ranges):
+            yield from texts
+
+def stitch_pages(page_texts):
+    """
+    Unir las páginas en un solo flujo de líneas. El encabezado de la tabla que se
+    repite al inicio de cada página (Codigo CUPS / NombreCups / Monto) se descarta,
+    para que un registro cortado por el salto de página siga con su nombre y su
+    precio en la página siguiente.
+    """
+    for text in page_texts:
+        at_page_top = True
+        for line in text.splitlines():
+            if at_page_top:
+                stripped = line.strip()
+                if not stripped or PDF_TOKENIZER.is_header(stripped):
+                    continue
+                at_page_top = False
+            yield line
+
+def cups_lines(file_path, workers=None):
+    """Líneas de entrada del tokenizador: texto de pdftotext, o el PDF leído directamente"""
+    if file_path.lower().endswith('.pdf'):
+        yield from stitch_pages(pdf_page_texts(file_path, workers))
+        return
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        yield from f
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Carga del catálogo CUPS compartida por parse-cups-pdf.py y parse-cups-simple.py.
+
+Genera INSERT ... ON DUPLICATE KEY UPDATE multi-fila, con las filas ordenadas por
+código y cortadas para que cada sentencia quepa en max_allowed_packet, o ejecuta
+la carga directamente con executemany parametrizado (scripts/db.py).
+En modo diff solo se escriben los códigos nuevos o con cambios respecto a la tabla.
+"""
+
+import csv
+import os
+import sys
+from collections import Counter
+from decimal import Decimal
+
+# Tamaño máximo de cada sentencia generada (bytes UTF-8). max_allowed_packet
+# es 4 MiB en MySQL 5.7 y 64 MiB en 8.0; se deja margen para el protocolo.
+MAX_STATEMENT_BYTES = 1024 * 1024
+# Filas por executemany en la carga directa
+EXECUTE_BATCH_SIZE = 1000
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'scripts')
+
+def sql_string(value):
+    """Literal de texto SQL (escapando comillas)"""
+    return "'" + value.replace("'", "''") + "'"
+
+def chunk_statements(value_rows, insert_header, update_clause, max_bytes=MAX_STATEMENT_BYTES):
+    """
+    Agrupar tuplas VALUES ya renderizadas en sentencias multi-fila de hasta
+    max_bytes. Una fila que no cabe sola va en su propia sentencia.
+    """
+    fixed_bytes = len(insert_header.encode('utf-8')) + len(update_clause.encode('utf-8')) + 2
+    statements = []
+    chunk = []
+    chunk_bytes = fixed_bytes
+
+    for row in value_rows:
+        row_bytes = len(row.encode('utf-8')) + 2  # separador ",\n"
+        if chunk and chunk_bytes + row_bytes > max_bytes:
+            statements.append(insert_header + "\n" + ",\n".join(chunk) + "\n" + update_clause)
+            chunk = []
+            chunk_bytes = fixed_bytes
+        chunk.append(row)
+        chunk_bytes += row_bytes
+
+    if chunk:
+        statements.append(insert_header + "\n" + ",\n".join(chunk) + "\n" + update_clause)
+
+    return statements
+
+def connect_catalog_db():
+    """Conexión con scripts/db.py (DB_HOST, DB_USER, DB_PASS, DB_NAME). Retorna None si falla."""
+    if SCRIPTS_DIR not in sys.path:
+        sys.path.insert(0, SCRIPTS_DIR)
+    from db import connect_db
+    return connect_db()
+
+def execute_upserts(sql, rows, batch_size=EXECUTE_BATCH_SIZE):
+    """
+    Ejecutar el upsert parametrizado sql con executemany en lotes (el conector
+    arma un INSERT multi-fila por lote) dentro de una transacción.
+    Retorna el total de filas enviadas, o None si falla.
+    """
+    conn = connect_catalog_db()
+    if not conn:
+        return None
+
+    from db import execute_batches
+
+    cursor = conn.cursor()
+    try:
+        sent = execute_batches(cursor, sql, rows, batch_size,
+                               on_batch=lambda sent: print(f"   Enviados: {sent}", end='\r'))
+        conn.commit()
+        print()
+        return sent
+    except Exception as e:
+        print(f"\n❌ Error al cargar los códigos CUPS: {e}")
+        conn.rollback()
+        return None
+    finally:
+        cursor.close()
+        conn.close()
+
+# Tipos de cambio del modo diff
+CHANGE_INSERT = 'nuevo'
+CHANGE_PRICE = 'precio'
+CHANGE_NAME = 'nombre'
+CHANGE_CATEGORY = 'categoría'
+
+def fetch_catalog_snapshot():
+    """Leer una vez {code: (name, category, base_price)} de la tabla cups. Retorna None si falla."""
+    conn = connect_catalog_db()
+    if not conn:
+        return None
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT code, name, category, base_price FROM cups")
+        return {code: (name, category, base_price) for code, name, category, base_price in cursor}
+    except Exception as e:
+        print(f"❌ Error al leer la tabla cups: {e}")
+        return None
+    finally:
+        cursor.close()
+        conn.close()
+
+def diff_catalog(records, snapshot, compare_category=False):
+    """
+    Comparar los registros parseados con el snapshot de cups.
+    Retorna (registros nuevos o con cambios, cambios), donde cada cambio es
+    (code, tipo, valor anterior, valor nuevo). La categoría solo se compara
+    si el upsert del script la actualiza.
+    """
+    changed_records = []
+    changes = []
+
+    for record in records:
+        code = record['code']
+        current = snapshot.get(code)
+        if current is None:
+            changed_records.append(record)
+            changes.append((code, CHANGE_INSERT, '', record['name']))
+            continue
+
+        name, category, base_price = current
+        record_changes = []
+        if Decimal(str(record['price'])) != Decimal(str(base_price or 0)):
+            record_changes.append((code, CHANGE_PRICE, base_price, record['price']))
+        if record['name'] != name:
+            record_changes.append((code, CHANGE_NAME, name, record['name']))
+        if compare_category and record['category'] != category:
+            record_changes.append((code, CHANGE_CATEGORY, category, record['category']))
+
+        if record_changes:
+            changed_records.append(record)
+            changes.extend(record_changes)
+
+    return changed_records, changes
+
+def write_change_report(changes, report_file):
+    """Escribir el reporte de cambios en CSV"""
+    with open(report_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['code', 'cambio', 'anterior', 'nuevo'])
+        writer.writerows(changes)
+
+def diff_against_table(records, report_file, compare_category=False):
+    """
+    Modo diff: filtrar records contra la tabla cups, imprimir el resumen y
+    escribir el reporte. Retorna los registros a escribir, o None si falla.
+    """
+    print(f"\n🔍 Comparando con la tabla cups...")
+    snapshot = fetch_catalog_snapshot()
+    if snapshot is None:
+        return None
+
+    changed_records, changes = diff_catalog(records, snapshot, compare_category)
+    counts = Counter(change_type for _, change_type, _, _ in changes)
+
+    print(f"📊 Códigos en la tabla: {len(snapshot)} | Parseados: {len(records)} | "
+          f"Sin cambios: {len(records) - len(changed_records)}")
+    for change_type in (CHANGE_INSERT, CHANGE_PRICE, CHANGE_NAME, CHANGE_CATEGORY):
+        if counts[change_type]:
+            print(f"  • {change_type}: {counts[change_type]}")
+
+    write_change_report(changes, report_file)
+    print(f"📝 Reporte de cambios: {report_file}")
+    return changed_records
@@ -4,10 +4,15 @@
 Script para parsear el PDF de códigos CUPS y generar SQL de importación.
 """
 
+import argparse
 import re
 import sys
 from collections import defaultdict
 
+from cups_categories import load_category_table
+from cups_parser import PDF_TOKENIZER, cups_lines
+from cups_sql import MAX_STATEMENT_BYTES, chunk_statements, diff_against_table, execute_upserts, sql_string
+
 def clean_text(text):
     """Limpia el texto removiendo caracteres especiales y normalizando espacios."""
     # Normalizar espacios
@@ -16,145 +21,117 @@ def clean_text(text):
     text = text.strip()
     return text
 
-def parse_cups_data(file_path):
-    """Parsea el archivo de texto extraído del PDF."""
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+def parse_cups_data(file_path, workers=None):
+    """
+    Parsea el archivo de texto extraído del PDF (registros repetidos incluidos).
+    Si file_path es el PDF, se lee directamente con workers procesos.
+    """
     
     cups_records = []
     
-    # Dividir por líneas pero mantener el contexto
-    lines = content.split('\n')
-    
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
+    lines = cups_lines(file_path, workers)
+    for code, name_parts, price, _ in PDF_TOKENIZER.records(lines):
+        # Unir partes del nombre
+        name = clean_text(' '.join(name_parts))
         
-        # Saltar líneas vacías y encabezado
-        if not line or 'codigo cups' in line.lower() or 'nombrecups' in line.lower() or line == 'Monto':
-            i += 1
-            continue
+        if not name:
+            name = f"PROCEDIMIENTO {code}"
         
-        # Buscar código CUPS (6 dígitos al inicio de línea)
-        match = re.match(r'^(\d{6})\s*(.*)', line)
+        # Sin precio (otro código, límite de líneas o fin de archivo)
+        if price is None:
+            price = "0"
         
-        if match:
-            code = match.group(1)
-            name_parts = [match.group(2)] if match.group(2) else []
-            
-            # Avanzar y recoger las líneas del nombre hasta encontrar el precio
-            i += 1
-            price = None
-            
-            while i < len(lines):
-                next_line = lines[i].strip()
-                
-                # Línea vacía, saltar
-                if not next_line:
-                    i += 1
-                    continue
-                
-                # Si es un número solo, es el precio
-                if re.match(r'^\d+$', next_line):
-                    price = next_line
-                    i += 1
-                    break
-                
-                # Si encuentra otro código CUPS, este registro no tiene precio
-                if re.match(r'^\d{6}', next_line):
-                    price = "0"
-                    break
-                
-                # Es parte del nombre
-                name_parts.append(next_line)
-                i += 1
-                
-                # Límite de seguridad para evitar bucles infinitos
-                if len(name_parts) > 10:
-                    price = "0"
-                    break
-            
-            # Unir partes del nombre
-            name = ' '.join(name_parts)
-            name = clean_text(name)
-            
-            if not name:
-                name = f"PROCEDIMIENTO {code}"
-            
-            if price is None:
-                price = "0"
-            
-            # Determinar categoría
-            category = determine_category(code)
-            
-            cups_records.append({
-                'code': code,
-                'name': name,
-                'price': price,
-                'category': category
-            })
-        else:
-            i += 1
+        cups_records.append({
+            'code': code,
+            'name': name,
+            'price': price,
+            'category': None
+        })
+    
+    # Categorías de todos los registros en una sola llamada
+    categories = CATEGORY_TABLE.classify_many([record['code'] for record in cups_records])
+    for record, category in zip(cups_records, categories):
+        record['category'] = category
     
     return cups_records
 
+# Categorías compartidas de cups_categories.json
+CATEGORY_TABLE = load_category_table()
+
 def determine_category(code):
     """Determina la categoría basada en el código CUPS."""
-    code_int = int(code)
-    
-    # Rangos comunes de códigos CUPS
-    if 880000 <= code_int <= 889999:
-        return 'Imágenes Diagnósticas'
-    elif 890000 <= code_int <= 899999:
-        return 'Consultas'
-    elif 870000 <= code_int <= 879999:
-        return 'Procedimientos'
-    elif 900000 <= code_int <= 919999:
-        return 'Laboratorio'
-    elif 920000 <= code_int <= 939999:
-        return 'Procedimientos'
-    else:
-        return 'Otros'
+    return CATEGORY_TABLE.classify(code)
 
-def generate_sql(cups_records):
-    """Genera el script SQL de importación."""
-    
-    sql_statements = []
-    
-    # Eliminar duplicados manteniendo el de mayor precio
-    unique_cups = {}
+# Upsert de cups: columnas, actualización y versión parametrizada para executemany
+INSERT_HEADER = ("INSERT INTO cups (code, name, category, base_price, status, complexity_level, requires_authorization) \n"
+                 "VALUES")
+UPDATE_CLAUSE = """ON DUPLICATE KEY UPDATE 
+  name = VALUES(name),
+  base_price = VALUES(base_price),
+  updated_at = CURRENT_TIMESTAMP;"""
+UPSERT_SQL = (INSERT_HEADER + " (%s, %s, %s, %s, 'Activo', 'Media', FALSE)\n" + UPDATE_CLAUSE.rstrip(';'))
+
+def unique_cups(cups_records):
+    """Eliminar duplicados manteniendo el de mayor precio, ordenados por código"""
+    unique = {}
     for record in cups_records:
         code = record['code']
         price = int(record['price'])
         
-        if code not in unique_cups or price > int(unique_cups[code]['price']):
-            unique_cups[code] = record
+        if code not in unique or price > int(unique[code]['price']):
+            unique[code] = record
     
-    # Generar INSERT statements
-    for code, record in sorted(unique_cups.items()):
-        name = record['name'].replace("'", "''")  # Escapar comillas
-        price = record['price']
-        category = record['category']
-        
-        sql = f"""INSERT INTO cups (code, name, category, base_price, status, complexity_level, requires_authorization) 
-VALUES ('{code}', '{name}', '{category}', {price}.00, 'Activo', 'Media', FALSE)
-ON DUPLICATE KEY UPDATE 
-  name = VALUES(name),
-  base_price = VALUES(base_price),
-  updated_at = CURRENT_TIMESTAMP;"""
-        
-        sql_statements.append(sql)
+    return [record for _, record in sorted(unique.items())]
+
+def generate_sql(cups_records, max_bytes=MAX_STATEMENT_BYTES):
+    """Genera INSERT multi-fila ordenados por código, cada uno de hasta max_bytes."""
+    
+    value_rows = [
+        f"({sql_string(record['code'])}, {sql_string(record['name'])}, {sql_string(record['category'])}, "
+        f"{record['price']}.00, 'Activo', 'Media', FALSE)"
+        for record in unique_cups(cups_records)
+    ]
     
-    return sql_statements
+    return chunk_statements(value_rows, INSERT_HEADER, UPDATE_CLAUSE, max_bytes)
+
+def load_cups(cups_records):
+    """Carga directa en cups con executemany parametrizado."""
+    rows = [(record['code'], record['name'], record['category'], int(record['price']))
+            for record in unique_cups(cups_records)]
+    return execute_upserts(UPSERT_SQL, rows)
+
+def parse_args():
+    """Leer argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Generar el SQL de importación de códigos CUPS")
+    parser.add_argument('input_file', nargs='?', default='/tmp/cups_data.txt',
+                        help="PDF de tarifas o su texto extraído con pdftotext (por defecto: /tmp/cups_data.txt)")
+    parser.add_argument('--output', default='/home/ubuntu/app/backend/migrations/import_cups_data.sql',
+                        help="Archivo SQL de salida")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Procesos para extraer las páginas del PDF (por defecto: número de CPUs)")
+    parser.add_argument('--max-statement-bytes', type=int, default=MAX_STATEMENT_BYTES,
+                        help=f"Tamaño máximo de cada INSERT multi-fila, según max_allowed_packet (por defecto: {MAX_STATEMENT_BYTES})")
+    parser.add_argument('--execute', action='store_true',
+                        help="Cargar directamente en la tabla cups (executemany) en vez de escribir el SQL")
+    parser.add_argument('--diff', action='store_true',
+                        help="Comparar con la tabla cups y escribir solo los códigos nuevos o con cambios")
+    parser.add_argument('--diff-report', default='cups_cambios.csv',
+                        help="Reporte CSV de cambios del modo --diff (por defecto: cups_cambios.csv)")
+    args = parser.parse_args()
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers debe ser mayor que 0")
+    if args.max_statement_bytes < 1024:
+        parser.error("--max-statement-bytes debe ser al menos 1024")
+    return args
 
 def main():
-    input_file = '/tmp/cups_data.txt'
-    output_file = '/home/ubuntu/app/backend/migrations/import_cups_data.sql'
+    args = parse_args()
+    input_file = args.input_file
+    output_file = args.output
     
     print(f"📄 Parseando archivo: {input_file}")
     
-    cups_records = parse_cups_data(input_file)
+    cups_records = parse_cups_data(input_file, args.workers)
     
     print(f"✅ Encontrados {len(cups_records)} registros CUPS")
     
@@ -163,20 +140,35 @@ def main():
     for record in cups_records[:5]:
         print(f"  {record['code']} - {record['name'][:60]}... - ${record['price']}")
     
-    # Generar SQL
-    print(f"\n🔄 Generando SQL...")
-    sql_statements = generate_sql(cups_records)
-    
-    # Escribir archivo SQL
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write("-- Importación de códigos CUPS desde PDF\n")
-        f.write("-- Generado automáticamente\n\n")
-        f.write("USE biosanar;\n\n")
-        f.write("\n\n".join(sql_statements))
-        f.write("\n")
-    
-    print(f"✅ SQL generado: {output_file}")
-    print(f"📊 Total de códigos únicos: {len(sql_statements)}")
+    records_to_write = cups_records
+    if args.diff:
+        records_to_write = diff_against_table(unique_cups(cups_records), args.diff_report)
+        if records_to_write is None:
+            sys.exit(1)
+    
+    if args.diff and not records_to_write:
+        print("✅ Sin cambios: no hay nada que escribir")
+    elif args.execute:
+        print(f"\n🔄 Cargando en la tabla cups...")
+        loaded = load_cups(records_to_write)
+        if loaded is None:
+            sys.exit(1)
+        print(f"✅ Códigos únicos cargados: {loaded}")
+    else:
+        # Generar SQL
+        print(f"\n🔄 Generando SQL...")
+        sql_statements = generate_sql(records_to_write, args.max_statement_bytes)
+        
+        # Escribir archivo SQL
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write("-- Importación de códigos CUPS desde PDF\n")
+            f.write("-- Generado automáticamente\n\n")
+            f.write("USE biosanar;\n\n")
+            f.write("\n\n".join(sql_statements))
+            f.write("\n")
+        
+        print(f"✅ SQL generado: {output_file}")
+        print(f"📊 Total de códigos únicos: {len(unique_cups(records_to_write))} en {len(sql_statements)} INSERT multi-fila")
     
     # Estadísticas por categoría
     categories = defaultdict(int)
@@ -8,110 +8,72 @@ CODIGO NOMBRE
 PRECIO
 """
 
-import re
+import argparse
+import sys
 from collections import defaultdict
 
+from cups_categories import load_category_table
+from cups_parser import END_EOF, SIMPLE_TOKENIZER, cups_lines
+from cups_sql import MAX_STATEMENT_BYTES, chunk_statements, diff_against_table, execute_upserts, sql_string
+
+# Categorías compartidas de cups_categories.json
+CATEGORY_TABLE = load_category_table()
+
 def determine_category(code):
     """Determina la categoría basada en el código CUPS."""
-    code_int = int(code)
-    
-    if 880000 <= code_int <= 889999:
-        return 'Imágenes Diagnósticas'
-    elif 890000 <= code_int <= 899999:
-        return 'Consultas'
-    elif 870000 <= code_int <= 879999:
-        return 'Procedimientos Quirúrgicos'
-    elif 900000 <= code_int <= 919999:
-        return 'Laboratorio'
-    elif 920000 <= code_int <= 939999:
-        return 'Procedimientos'
-    elif 230000 <= code_int <= 239999:
-        return 'Radiología'
-    else:
-        return 'Otros Servicios'
+    return CATEGORY_TABLE.classify(code)
 
-def parse_cups_simple(file_path):
-    """Parsea el archivo de texto línea por línea."""
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = [line.strip() for line in f.readlines()]
+def parse_cups_simple(file_path, workers=None):
+    """
+    Parsea el archivo de texto línea por línea.
+    Si file_path es el PDF, se lee directamente con workers procesos.
+    """
     
     cups_dict = {}  # Usar dict para eliminar duplicados automáticamente
     
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        
-        # Saltar líneas vacías, encabezados
-        if not line or 'codigo cups' in line.lower() or line == 'Monto':
-            i += 1
+    lines = cups_lines(file_path, workers)
+    for code, name_parts, price, end in SIMPLE_TOKENIZER.records(lines):
+        # Un registro cortado por el fin de archivo no se guarda
+        if end == END_EOF:
             continue
         
-        # Buscar línea con código (6 dígitos al inicio)
-        match = re.match(r'^(\d{6})\s+(.+)$', line)
+        if price is not None:
+            price = int(price)
+            # Mantener el registro con mayor precio
+            if code in cups_dict and price <= cups_dict[code]['price']:
+                continue
+        elif code in cups_dict:
+            # Sin precio solo se guarda si el código es nuevo
+            continue
         
-        if match:
-            code = match.group(1)
-            name = match.group(2).strip()
-            
-            # Si el nombre está cortado, buscar continuación
-            i += 1
-            continuation_lines = []
-            
-            # Recoger líneas hasta encontrar precio o siguiente código
-            while i < len(lines):
-                next_line = lines[i].strip()
-                
-                # Línea vacía, continuar
-                if not next_line:
-                    i += 1
-                    continue
-                
-                # Si es un precio (solo dígitos)
-                if re.match(r'^\d+$', next_line):
-                    price = int(next_line)
-                    i += 1
-                    
-                    # Guardar en dict (sobrescribe duplicados automáticamente)
-                    # Mantener el registro con mayor precio
-                    if code not in cups_dict or price > cups_dict[code]['price']:
-                        full_name = name
-                        if continuation_lines:
-                            full_name = name + ' ' + ' '.join(continuation_lines)
-                        
-                        cups_dict[code] = {
-                            'code': code,
-                            'name': full_name,
-                            'price': price,
-                            'category': determine_category(code)
-                        }
-                    break
-                
-                # Si es otro código CUPS, salir sin precio
-                if re.match(r'^\d{6}', next_line):
-                    if code not in cups_dict:
-                        full_name = name
-                        if continuation_lines:
-                            full_name = name + ' ' + ' '.join(continuation_lines)
-                        
-                        cups_dict[code] = {
-                            'code': code,
-                            'name': full_name,
-                            'price': 0,
-                            'category': determine_category(code)
-                        }
-                    break
-                
-                # Es continuación del nombre
-                continuation_lines.append(next_line)
-                i += 1
-        else:
-            i += 1
-    
-    return list(cups_dict.values())
+        cups_dict[code] = {
+            'code': code,
+            'name': ' '.join(name_parts),
+            'price': price or 0,
+            'category': None
+        }
+    
+    # Categorías de todos los códigos en una sola llamada
+    cups_records = list(cups_dict.values())
+    categories = CATEGORY_TABLE.classify_many([record['code'] for record in cups_records])
+    for record, category in zip(cups_records, categories):
+        record['category'] = category
+    
+    return cups_records
 
-def generate_sql_bulk(cups_records):
-    """Genera SQL con bulk INSERT para mejor rendimiento."""
+# Upsert de cups: columnas, actualización y versión parametrizada para executemany
+INSERT_HEADER = ("INSERT INTO cups (code, name, category, base_price, status, complexity_level, requires_authorization, created_at)\n"
+                 "VALUES")
+UPDATE_CLAUSE = """ON DUPLICATE KEY UPDATE 
+    name = VALUES(name),
+    base_price = VALUES(base_price),
+    category = VALUES(category),
+    updated_at = NOW();
+"""
+UPSERT_SQL = (INSERT_HEADER + " (%s, %s, %s, %s, 'Activo', 'Media', FALSE, NOW())\n" + UPDATE_CLAUSE.rstrip(';\n'))
+
+def generate_sql_bulk(cups_records, max_bytes=MAX_STATEMENT_BYTES):
+    """Genera SQL con INSERT multi-fila, ordenados por código y de hasta max_bytes cada uno."""
     
     if not cups_records:
         return []
@@ -130,22 +92,12 @@ def generate_sql_bulk(cups_records):
         ""
     ]
     
-    # Generar INSERTs individuales con ON DUPLICATE KEY UPDATE
-    for record in sorted_records:
-        name = record['name'].replace("'", "''")  # Escapar comillas
-        code = record['code']
-        price = record['price']
-        category = record['category']
-        
-        sql = f"""INSERT INTO cups (code, name, category, base_price, status, complexity_level, requires_authorization, created_at)
-VALUES ('{code}', '{name}', '{category}', {price}.00, 'Activo', 'Media', FALSE, NOW())
-ON DUPLICATE KEY UPDATE 
-    name = VALUES(name),
-    base_price = VALUES(base_price),
-    category = VALUES(category),
-    updated_at = NOW();
-"""
-        sql_lines.append(sql)
+    value_rows = [
+        f"({sql_string(record['code'])}, {sql_string(record['name'])}, {sql_string(record['category'])}, "
+        f"{record['price']}.00, 'Activo', 'Media', FALSE, NOW())"
+        for record in sorted_records
+    ]
+    sql_lines.extend(chunk_statements(value_rows, INSERT_HEADER, UPDATE_CLAUSE, max_bytes))
     
     sql_lines.extend([
         "",
@@ -156,13 +108,44 @@ ON DUPLICATE KEY UPDATE
     
     return sql_lines
 
+def load_cups(cups_records):
+    """Carga directa en cups con executemany parametrizado, ordenada por código."""
+    rows = [(record['code'], record['name'], record['category'], record['price'])
+            for record in sorted(cups_records, key=lambda x: x['code'])]
+    return execute_upserts(UPSERT_SQL, rows)
+
+def parse_args():
+    """Leer argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Generar el SQL de importación masiva de códigos CUPS")
+    parser.add_argument('input_file', nargs='?', default='/tmp/cups_data.txt',
+                        help="PDF de tarifas o su texto extraído con pdftotext (por defecto: /tmp/cups_data.txt)")
+    parser.add_argument('--output', default='/home/ubuntu/app/backend/migrations/import_cups_data.sql',
+                        help="Archivo SQL de salida")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Procesos para extraer las páginas del PDF (por defecto: número de CPUs)")
+    parser.add_argument('--max-statement-bytes', type=int, default=MAX_STATEMENT_BYTES,
+                        help=f"Tamaño máximo de cada INSERT multi-fila, según max_allowed_packet (por defecto: {MAX_STATEMENT_BYTES})")
+    parser.add_argument('--execute', action='store_true',
+                        help="Cargar directamente en la tabla cups (executemany) en vez de escribir el SQL")
+    parser.add_argument('--diff', action='store_true',
+                        help="Comparar con la tabla cups y escribir solo los códigos nuevos o con cambios")
+    parser.add_argument('--diff-report', default='cups_cambios.csv',
+                        help="Reporte CSV de cambios del modo --diff (por defecto: cups_cambios.csv)")
+    args = parser.parse_args()
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers debe ser mayor que 0")
+    if args.max_statement_bytes < 1024:
+        parser.error("--max-statement-bytes debe ser al menos 1024")
+    return args
+
 def main():
-    input_file = '/tmp/cups_data.txt'
-    output_file = '/home/ubuntu/app/backend/migrations/import_cups_data.sql'
+    args = parse_args()
+    input_file = args.input_file
+    output_file = args.output
     
     print("📄 Parseando códigos CUPS...")
     
-    cups_records = parse_cups_simple(input_file)
+    cups_records = parse_cups_simple(input_file, args.workers)
     
     print(f"✅ Encontrados {len(cups_records)} códigos CUPS únicos\n")
     
@@ -193,15 +176,34 @@ def main():
         name_short = record['name'][:60] + '...' if len(record['name']) > 60 else record['name']
         print(f"  {record['code']} - {name_short} - ${record['price']:,}")
     
+    records_to_write = cups_records
+    if args.diff:
+        # El upsert de este script también actualiza la categoría
+        records_to_write = diff_against_table(cups_records, args.diff_report, compare_category=True)
+        if records_to_write is None:
+            sys.exit(1)
+        if not records_to_write:
+            print("✅ Sin cambios: no hay nada que escribir")
+            return cups_records
+    
+    if args.execute:
+        print(f"\n🔄 Cargando en la tabla cups...")
+        loaded = load_cups(records_to_write)
+        if loaded is None:
+            sys.exit(1)
+        print(f"✅ Códigos cargados: {loaded}")
+        return cups_records
+    
     # Generar SQL
     print(f"\n🔄 Generando archivo SQL...")
-    sql_lines = generate_sql_bulk(cups_records)
+    sql_lines = generate_sql_bulk(records_to_write, args.max_statement_bytes)
     
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write('\n'.join(sql_lines))
     
+    statement_count = sum(1 for line in sql_lines if line.startswith('INSERT INTO'))
     print(f"✅ Archivo generado: {output_file}")
-    print(f"📦 Total de statements: {len(cups_records)} INSERTs")
+    print(f"📦 Total: {len(records_to_write)} códigos en {statement_count} INSERT multi-fila")
     
     return cups_records
 
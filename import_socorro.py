@@ -1,33 +1,61 @@
 #!/usr/bin/env python3
+import argparse
 import csv
+import os
 import re
-from datetime import datetime
-
-def process_csv_to_sql():
-    # Mapeo de tipos de documento CSV a IDs de la base de datos
-    document_type_mapping = {
-        'CC': 1,
-        'CE': 2, 
-        'TI': 3,
-        'PS': 4,
-        'PT': 6,  # Mapear PT a "Otro" 
-        'RC': 6,  # Mapear RC a "Otro"
-        'NIT': 5
-    }
-    
-    # Mapeo de géneros
-    gender_mapping = {
-        'M': 'Masculino',
-        'F': 'Femenino',
-        '': 'No especificado'
-    }
-    
-    sql_statements = []
-    errors = []
-    
-    with open('/home/ubuntu/app/socorro.csv', 'r', encoding='utf-8-sig') as file:  # utf-8-sig para manejar BOM
+import sys
+
+# Componentes compartidos con los scripts de importación
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+from date_normalizer import DateNormalizer
+
+SOCORRO_CSV = '/home/ubuntu/app/socorro.csv'
+SQL_OUTPUT = '/home/ubuntu/app/import_socorro.sql'
+
+# Tamaño máximo de cada INSERT multi-fila, con margen bajo max_allowed_packet
+MAX_PACKET_BYTES = 1024 * 1024
+# Sentencias INSERT por transacción en el archivo generado
+STATEMENTS_PER_TRANSACTION = 50
+
+INSERT_PREFIX = ("INSERT IGNORE INTO patients_socorro "
+                 "(document, name, birth_date, gender, document_type_id, status, created_at) VALUES\n")
+
+# Modo --direct: sentencia parametrizada y filas por executemany
+DIRECT_INSERT_SQL = ("INSERT IGNORE INTO patients_socorro "
+                     "(document, name, birth_date, gender, document_type_id, status, created_at) "
+                     "VALUES (%s, %s, %s, %s, %s, 'Activo', NOW())")
+DIRECT_BATCH_SIZE = 1000
+
+# Mapeo de tipos de documento CSV a IDs de la base de datos
+document_type_mapping = {
+    'CC': 1,
+    'CE': 2,
+    'TI': 3,
+    'PS': 4,
+    'PT': 6,  # Mapear PT a "Otro"
+    'RC': 6,  # Mapear RC a "Otro"
+    'NIT': 5
+}
+
+# Mapeo de géneros
+gender_mapping = {
+    'M': 'Masculino',
+    'F': 'Femenino',
+    '': 'No especificado'
+}
+
+# Fecha_Nacimiento llega como YYYY/MM/DD o YYYY-MM-DD; se valida tras unificar el separador
+BIRTH_DATES = DateNormalizer(['YYYY-MM-DD'])
+
+def read_socorro_rows(csv_path, errors):
+    """
+    Leer el CSV de Socorro y generar una tupla por paciente válido:
+    (document, full_name, birth_date, gender, document_type_id).
+    Los problemas por fila se agregan a errors.
+    """
+    with open(csv_path, 'r', encoding='utf-8-sig') as file:  # utf-8-sig para manejar BOM
         reader = csv.DictReader(file)
-        
+
         for row_num, row in enumerate(reader, start=2):  # Start at 2 because of header
             try:
                 # Procesar nombre completo
@@ -35,7 +63,7 @@ def process_csv_to_sql():
                 segundo_apellido = row['Segundo_Apellido'].strip() if row['Segundo_Apellido'] and row['Segundo_Apellido'] != 'NULL' else ''
                 primer_nombre = row['Primer_Nombre'].strip() if row['Primer_Nombre'] and row['Primer_Nombre'] != 'NULL' else ''
                 segundo_nombre = row['Segundo_Nombre'].strip() if row['Segundo_Nombre'] and row['Segundo_Nombre'] != 'NULL' else ''
-                
+
                 # Construir nombre completo
                 nombres = []
                 if primer_nombre:
@@ -46,86 +74,214 @@ def process_csv_to_sql():
                     nombres.append(primer_apellido)
                 if segundo_apellido:
                     nombres.append(segundo_apellido)
-                
+
                 full_name = ' '.join(nombres)
-                
+
                 # Procesar documento
                 document = row['Numero_Documento'].strip()
                 document_type = row['Tipo_Documento'].strip()
                 document_type_id = document_type_mapping.get(document_type, 6)  # Default to "Otro"
-                
+
                 # Procesar fecha de nacimiento
                 birth_date = None
                 if row['Fecha_Nacimiento'] and row['Fecha_Nacimiento'] != 'NULL':
-                    try:
-                        date_str = row['Fecha_Nacimiento'].strip()
-                        # Convertir formato YYYY/MM/DD a YYYY-MM-DD
-                        if '/' in date_str:
-                            birth_date = date_str.replace('/', '-')
-                        else:
-                            birth_date = date_str
-                        
-                        # Validar que la fecha sea válida
-                        datetime.strptime(birth_date, '%Y-%m-%d')
-                    except:
-                        birth_date = None
-                
+                    # Convertir formato YYYY/MM/DD a YYYY-MM-DD y validar que la fecha sea válida
+                    date_str = row['Fecha_Nacimiento'].strip().replace('/', '-')
+                    if BIRTH_DATES.parse(date_str):
+                        birth_date = date_str
+
                 # Procesar género
                 gender = gender_mapping.get(row['Genero'].strip(), 'No especificado')
-                
+
                 # Validar que tengamos al menos documento y nombre
                 if not document or not full_name:
                     errors.append(f"Fila {row_num}: Documento o nombre vacío")
                     continue
-                
-                # Escapar comillas simples en strings
-                full_name = full_name.replace("'", "\\'")
-                document = document.replace("'", "\\'")
-                
-                # Construir SQL
-                sql = f"""INSERT IGNORE INTO patients_socorro (
-                    document, 
-                    name, 
-                    birth_date, 
-                    gender, 
-                    document_type_id,
-                    status,
-                    created_at
-                ) VALUES (
-                    '{document}',
-                    '{full_name}',
-                    {'NULL' if not birth_date else f"'{birth_date}'"},
-                    '{gender}',
-                    {document_type_id},
-                    'Activo',
-                    NOW()
-                );"""
-                
-                sql_statements.append(sql)
-                
+
+                yield (document, full_name, birth_date, gender, document_type_id)
+
             except Exception as e:
                 errors.append(f"Error en fila {row_num}: {str(e)}")
-    
-    return sql_statements, errors
-
-# Ejecutar procesamiento
-print("Procesando archivo CSV...")
-statements, errors = process_csv_to_sql()
-
-print(f"Generadas {len(statements)} sentencias SQL")
-if errors:
-    print(f"Errores encontrados: {len(errors)}")
-    for error in errors[:5]:  # Mostrar solo los primeros 5 errores
-        print(f"  {error}")
-
-# Guardar SQL en archivo
-with open('/home/ubuntu/app/import_socorro.sql', 'w', encoding='utf-8') as f:
-    for statement in statements:
-        f.write(statement + '\n')
-
-print("Archivo SQL generado: /home/ubuntu/app/import_socorro.sql")
-
-# Mostrar algunos ejemplos
-print("\nEjemplos de sentencias generadas:")
-for i, stmt in enumerate(statements[:3]):
-    print(f"{i+1}. {stmt[:100]}...")
\ No newline at end of file
+
+def sql_literal(value):
+    """Convertir un valor a literal SQL (NULL, número o cadena escapada)"""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, int):
+        return str(value)
+    return "'" + str(value).replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+def format_values(patient):
+    """Tupla VALUES de un paciente para el INSERT multi-fila"""
+    document, full_name, birth_date, gender, document_type_id = patient
+    values = ', '.join(sql_literal(value) for value in (document, full_name, birth_date, gender, document_type_id))
+    return f"({values}, 'Activo', NOW())"
+
+def generate_insert_statements(patients, max_packet_bytes=MAX_PACKET_BYTES):
+    """
+    Agrupar pacientes en sentencias INSERT IGNORE ... VALUES (...),(...)
+    sin superar max_packet_bytes por sentencia. Genera (sentencia, filas).
+    """
+    prefix_bytes = len(INSERT_PREFIX.encode('utf-8'))
+    values = []
+    size = prefix_bytes
+
+    for patient in patients:
+        row_sql = format_values(patient)
+        row_bytes = len(row_sql.encode('utf-8')) + 2  # ",\n"
+
+        if values and size + row_bytes > max_packet_bytes:
+            yield INSERT_PREFIX + ',\n'.join(values) + ';', len(values)
+            values = []
+            size = prefix_bytes
+
+        values.append(row_sql)
+        size += row_bytes
+
+    if values:
+        yield INSERT_PREFIX + ',\n'.join(values) + ';', len(values)
+
+def process_csv_to_sql(output_path=SQL_OUTPUT, max_packet_bytes=MAX_PACKET_BYTES,
+                       statements_per_transaction=STATEMENTS_PER_TRANSACTION, csv_path=SOCORRO_CSV):
+    """
+    Generar el archivo SQL con INSERT multi-fila agrupados en transacciones.
+    Retorna (pacientes escritos, sentencias escritas, errores, primeras sentencias).
+    """
+    errors = []
+    examples = []
+    total_rows = 0
+    total_statements = 0
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write("SET autocommit = 0;\n")
+
+        statements = generate_insert_statements(read_socorro_rows(csv_path, errors), max_packet_bytes)
+        for statement, row_count in statements:
+            if total_statements % statements_per_transaction == 0:
+                if total_statements > 0:
+                    f.write("COMMIT;\n")
+                f.write("START TRANSACTION;\n")
+
+            f.write(statement + '\n')
+            total_statements += 1
+            total_rows += row_count
+            if len(examples) < 3:
+                examples.append(statement)
+
+        if total_statements > 0:
+            f.write("COMMIT;\n")
+        f.write("SET autocommit = 1;\n")
+
+    return total_rows, total_statements, errors, examples
+
+def import_direct(conn, batch_size=DIRECT_BATCH_SIZE):
+    """
+    Insertar los pacientes directamente en patients_socorro con executemany
+    parametrizado por lotes, sin archivo SQL intermedio.
+    Retorna (pacientes enviados, pacientes insertados, errores).
+    """
+    from db import execute_batches
+
+    cursor = conn.cursor()
+    errors = []
+    inserted = 0
+
+    def on_batch(sent):
+        nonlocal inserted
+        inserted += cursor.rowcount
+        conn.commit()
+        print(f"   Enviados: {sent} | Insertados: {inserted}", end='\r')
+
+    try:
+        sent = execute_batches(cursor, DIRECT_INSERT_SQL, read_socorro_rows(SOCORRO_CSV, errors),
+                               batch_size, on_batch)
+        return sent, inserted, errors
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def parse_args():
+    """Leer argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Generar SQL de importación de socorro.csv a patients_socorro")
+    parser.add_argument('--max-packet-bytes', type=int, default=MAX_PACKET_BYTES,
+                        help=f"Tamaño máximo de cada INSERT multi-fila en bytes (por defecto: {MAX_PACKET_BYTES})")
+    parser.add_argument('--statements-per-transaction', type=int, default=STATEMENTS_PER_TRANSACTION,
+                        help=f"Sentencias INSERT por transacción (por defecto: {STATEMENTS_PER_TRANSACTION})")
+    parser.add_argument('--direct', action='store_true',
+                        help="Insertar directamente en la base de datos en lugar de generar el archivo SQL")
+    parser.add_argument('--batch-size', type=int, default=DIRECT_BATCH_SIZE,
+                        help=f"Filas por executemany en modo --direct (por defecto: {DIRECT_BATCH_SIZE})")
+    args = parser.parse_args()
+    if args.batch_size < 1:
+        parser.error("--batch-size debe ser mayor que 0")
+    if args.max_packet_bytes < 1024:
+        parser.error("--max-packet-bytes debe ser al menos 1024")
+    if args.statements_per_transaction < 1:
+        parser.error("--statements-per-transaction debe ser mayor que 0")
+    return args
+
+def print_date_rejects():
+    """Fechas de nacimiento descartadas por formato"""
+    for date_format, count in BIRTH_DATES.reject_summary().items():
+        print(f"Fechas de nacimiento descartadas ({date_format}): {count}")
+
+def main_direct(batch_size):
+    """Importar socorro.csv directamente a patients_socorro"""
+    # Solo el modo --direct necesita el driver de MySQL (scripts/db.py)
+    from db import connect_db
+
+    print("Importando archivo CSV directamente a patients_socorro...")
+    conn = connect_db()
+    if not conn:
+        return 1
+
+    try:
+        sent, inserted, errors = import_direct(conn, batch_size)
+    except Exception as e:
+        print(f"\n❌ Error al importar pacientes: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+    finally:
+        conn.close()
+
+    print(f"\nPacientes enviados: {sent}")
+    print(f"Pacientes insertados: {inserted}")
+    print(f"Omitidos por documento existente: {sent - inserted}")
+    print_date_rejects()
+    if errors:
+        print(f"Errores encontrados: {len(errors)}")
+        for error in errors[:5]:  # Mostrar solo los primeros 5 errores
+            print(f"  {error}")
+    return 0
+
+def main():
+    args = parse_args()
+
+    if args.direct:
+        return main_direct(args.batch_size)
+
+    # Ejecutar procesamiento
+    print("Procesando archivo CSV...")
+    total_rows, total_statements, errors, examples = process_csv_to_sql(
+        SQL_OUTPUT, args.max_packet_bytes, args.statements_per_transaction)
+
+    print(f"Generadas {total_statements} sentencias SQL con {total_rows} pacientes")
+    print_date_rejects()
+    if errors:
+        print(f"Errores encontrados: {len(errors)}")
+        for error in errors[:5]:  # Mostrar solo los primeros 5 errores
+            print(f"  {error}")
+
+    print(f"Archivo SQL generado: {SQL_OUTPUT}")
+
+    # Mostrar algunos ejemplos
+    print("\nEjemplos de sentencias generadas:")
+    for i, stmt in enumerate(examples[:3]):
+        print(f"{i+1}. {stmt[:100]}...")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
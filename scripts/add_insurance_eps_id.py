@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """
 Script para agregar la columna insurance_eps_id con valor 12 a san_gil.csv
+Las filas se copian una a una, sin cargar el archivo completo en memoria.
 """
 
 import csv
@@ -8,25 +9,25 @@ import csv
 input_file = "/home/ubuntu/app/san_gil.csv"
 output_file = "/home/ubuntu/app/san_gil_updated.csv"
 
-# Leer el archivo original
-with open(input_file, 'r', encoding='iso-8859-1') as infile:
-    reader = csv.reader(infile)
-    rows = list(reader)
-
-# Agregar la columna al encabezado
-if rows:
-    header = rows[0]
-    header.append('insurance_eps_id')
-    
-    # Agregar el valor 12 a cada fila de datos
-    for i in range(1, len(rows)):
-        rows[i].append('12')
+total_rows = 0
 
-# Escribir el archivo actualizado
-with open(output_file, 'w', encoding='utf-8', newline='') as outfile:
+with open(input_file, 'r', encoding='iso-8859-1') as infile, \
+        open(output_file, 'w', encoding='utf-8', newline='') as outfile:
+    reader = csv.reader(infile)
     writer = csv.writer(outfile)
-    writer.writerows(rows)
+    
+    # Agregar la columna al encabezado
+    header = next(reader, None)
+    if header is not None:
+        header.append('insurance_eps_id')
+        writer.writerow(header)
+        
+        # Agregar el valor 12 a cada fila de datos
+        for row in reader:
+            row.append('12')
+            writer.writerow(row)
+            total_rows += 1
 
 print(f"✅ Archivo actualizado: {output_file}")
-print(f"📊 Total de registros: {len(rows) - 1}")
+print(f"📊 Total de registros: {total_rows}")
 print(f"✅ Columna 'insurance_eps_id' agregada con valor 12")
@@ -2,23 +2,56 @@
 """
 Script para analizar pacientes duplicados y generar recomendaciones
 """
-import mysql.connector
+import argparse
 import csv
+import re
+import unicodedata
+from collections import defaultdict
 from datetime import datetime
+from difflib import SequenceMatcher
 
-# Configuración de la base de datos
-DB_CONFIG = {
-    'host': '127.0.0.1',
-    'user': 'biosanar_user',
-    'password': '/6Tx0eXqFQONTFuoc7aqPicNlPhmuINU',
-    'database': 'biosanar'
-}
+from db import get_connection
+
+# Parámetros de la detección aproximada (--fuzzy)
+FUZZY_THRESHOLD = 0.88          # Puntaje mínimo para considerar dos pacientes duplicados
+MAX_BLOCK_SIZE = 50             # Bloques más grandes se comparan por vecindad ordenada
+NEIGHBORHOOD_WINDOW = 10        # Vecinos comparados en bloques grandes
+DOCUMENT_PREFIX_LENGTH = 8      # Dígitos del documento usados como llave de bloque
+
+def check_status_name_index(cursor):
+    """
+    Verificar que patients tenga un índice que empiece por (status, name),
+    necesario para agrupar los duplicados con un solo recorrido del índice
+    """
+    cursor.execute("""
+    SELECT INDEX_NAME AS index_name,
+           GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX) AS index_columns
+    FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE()
+    AND TABLE_NAME = 'patients'
+    GROUP BY INDEX_NAME
+    """)
+    
+    for index in cursor.fetchall():
+        # Comparar columnas completas: 'status,name_normalized' también empieza por 'status,name'
+        columns = index['index_columns'].lower().split(',')
+        if columns[:2] == ['status', 'name']:
+            print(f"✅ Índice (status, name) disponible: {index['index_name']}")
+            return True
+    
+    print("⚠️  No existe un índice sobre patients (status, name); la consulta recorrerá la tabla completa")
+    print("   Sugerencia: CREATE INDEX idx_patients_status_name ON patients (status, name);")
+    return False
 
 def get_duplicates():
     """Obtiene todos los pacientes duplicados con detalles"""
-    conn = mysql.connector.connect(**DB_CONFIG)
+    conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     
+    check_status_name_index(cursor)
+    
+    # Los nombres repetidos y su total se calculan una sola vez en una tabla
+    # derivada agrupada (recorrido del índice (status, name)) y se unen por nombre
     query = """
     SELECT 
         p.id,
@@ -32,18 +65,17 @@ def get_duplicates():
         eps.name as eps_name,
         p.created_at,
         z.name as zone_name,
-        (SELECT COUNT(*) FROM patients WHERE name = p.name AND status = 1) as total_duplicados
-    FROM patients p
-    LEFT JOIN eps ON p.insurance_eps_id = eps.id
-    LEFT JOIN zones z ON p.zone_id = z.id
-    WHERE p.status = 1 
-    AND p.name IN (
-        SELECT name 
+        dup.total_duplicados
+    FROM (
+        SELECT name, COUNT(*) as total_duplicados
         FROM patients 
         WHERE status = 1 
         GROUP BY name 
         HAVING COUNT(*) > 1
-    )
+    ) dup
+    JOIN patients p ON p.name = dup.name AND p.status = 1
+    LEFT JOIN eps ON p.insurance_eps_id = eps.id
+    LEFT JOIN zones z ON p.zone_id = z.id
     ORDER BY p.name, p.created_at DESC
     """
     
@@ -54,12 +86,187 @@ def get_duplicates():
     
     return results
 
-def analyze_duplicates(duplicates):
+PATIENT_COLUMNS_QUERY = """
+    SELECT 
+        p.id,
+        p.name,
+        p.document,
+        p.phone,
+        p.email,
+        p.birth_date,
+        p.gender,
+        p.address,
+        eps.name as eps_name,
+        p.created_at,
+        z.name as zone_name
+    FROM patients p
+    LEFT JOIN eps ON p.insurance_eps_id = eps.id
+    LEFT JOIN zones z ON p.zone_id = z.id
+    WHERE p.status = 1
+"""
+
+# Reglas fonéticas simplificadas para nombres en español, aplicadas en orden
+PHONETIC_RULES = [
+    (re.compile(r'LL'), 'Y'),
+    (re.compile(r'CH'), 'X'),
+    (re.compile(r'QU'), 'K'),
+    (re.compile(r'C(?=[EI])'), 'S'),
+    (re.compile(r'G(?=[EI])'), 'J'),
+    (re.compile(r'GU(?=[EI])'), 'G'),
+    (re.compile(r'[CQ]'), 'K'),
+    (re.compile(r'Z'), 'S'),
+    (re.compile(r'[VW]'), 'B'),
+    (re.compile(r'H'), ''),
+    (re.compile(r'Y(?![AEIOU])'), 'I'),
+    (re.compile(r'(.)\1+'), r'\1'),
+]
+
+def normalize_name(name):
+    """Nombre sin tildes, en mayúsculas, solo letras y con los tokens ordenados"""
+    if not name:
+        return ''
+    text = unicodedata.normalize('NFKD', str(name).upper())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    tokens = re.sub(r'[^A-Z ]', ' ', text).split()
+    # Ordenar los tokens hace equivalentes "NOMBRES APELLIDOS" y "APELLIDOS NOMBRES"
+    return ' '.join(sorted(tokens))
+
+def phonetic_code(token):
+    """Código fonético de un token: reglas del español y sin vocales salvo la inicial"""
+    code = token
+    for pattern, replacement in PHONETIC_RULES:
+        code = pattern.sub(replacement, code)
+    if not code:
+        return ''
+    return code[0] + re.sub(r'[AEIOU]', '', code[1:])
+
+def blocking_keys(patient):
+    """Llaves de bloque del paciente: fonética del nombre, fecha de nacimiento y prefijo de documento"""
+    keys = []
+    name_key = patient['name_key']
+    if name_key:
+        keys.append(('fonetica', ' '.join(sorted(phonetic_code(t) for t in name_key.split()))))
+    if patient.get('birth_date'):
+        keys.append(('nacimiento', str(patient['birth_date'])))
+    document = re.sub(r'\D', '', str(patient.get('document') or ''))
+    if len(document) >= DOCUMENT_PREFIX_LENGTH:
+        keys.append(('documento', document[:DOCUMENT_PREFIX_LENGTH]))
+    return keys
+
+def candidate_pairs(patients):
+    """
+    Pares (i, j) a comparar: solo pacientes que comparten alguna llave de bloque.
+    Los bloques más grandes que MAX_BLOCK_SIZE se comparan por vecindad
+    ordenada por nombre para no caer en comparaciones O(n²).
+    """
+    blocks = defaultdict(list)
+    for index, patient in enumerate(patients):
+        for key in blocking_keys(patient):
+            blocks[key].append(index)
+    
+    pairs = set()
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        if len(members) <= MAX_BLOCK_SIZE:
+            for a in range(len(members)):
+                for b in range(a + 1, len(members)):
+                    pairs.add((members[a], members[b]))
+        else:
+            members = sorted(members, key=lambda i: patients[i]['name_key'])
+            for a in range(len(members)):
+                for b in range(a + 1, min(a + 1 + NEIGHBORHOOD_WINDOW, len(members))):
+                    pairs.add((min(members[a], members[b]), max(members[a], members[b])))
+    return pairs
+
+def score_pair(a, b, threshold=FUZZY_THRESHOLD):
+    """
+    Similitud entre dos pacientes (0 a 1) según nombre, documento y fecha de nacimiento.
+    Retorna 0 sin calcular la similitud completa si el par no puede alcanzar el umbral.
+    """
+    document_a = str(a.get('document') or '').strip()
+    document_b = str(b.get('document') or '').strip()
+    if document_a and document_a == document_b:
+        return 1.0
+    
+    adjustment = 0.0
+    if a.get('birth_date') and b.get('birth_date'):
+        adjustment += 0.1 if a['birth_date'] == b['birth_date'] else -0.2
+    
+    # Documento truncado o incompleto de un mismo paciente
+    shorter, longer = sorted((document_a, document_b), key=len)
+    if len(shorter) >= DOCUMENT_PREFIX_LENGTH and longer.startswith(shorter):
+        adjustment += 0.1
+    
+    # Similitud de nombre mínima para alcanzar el umbral
+    required = threshold - adjustment
+    if required > 1.0:
+        return 0.0
+    
+    if a['name_key'] == b['name_key']:
+        name_score = 1.0
+    else:
+        matcher = SequenceMatcher(None, a['name_key'], b['name_key'])
+        # Cotas superiores baratas antes del cálculo completo
+        if matcher.real_quick_ratio() < required or matcher.quick_ratio() < required:
+            return 0.0
+        name_score = matcher.ratio()
+    
+    return min(name_score + adjustment, 1.0)
+
+def find_fuzzy_duplicates(patients, threshold=FUZZY_THRESHOLD):
+    """Agrupar pacientes similares (unión de pares sobre el umbral). Retorna listas de pacientes."""
+    for patient in patients:
+        patient['name_key'] = normalize_name(patient['name'])
+    
+    parent = list(range(len(patients)))
+    
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    for a, b in candidate_pairs(patients):
+        root_a, root_b = find(a), find(b)
+        # Pares que ya quedaron en el mismo grupo no necesitan compararse
+        if root_a != root_b and score_pair(patients[a], patients[b], threshold) >= threshold:
+            parent[root_b] = root_a
+    
+    clusters = defaultdict(list)
+    for index, patient in enumerate(patients):
+        clusters[find(index)].append(patient)
+    
+    return [members for members in clusters.values() if len(members) > 1]
+
+def get_fuzzy_duplicates():
+    """Obtiene los pacientes duplicados por similitud aproximada, con el mismo formato que get_duplicates"""
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(PATIENT_COLUMNS_QUERY)
+    patients = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    
+    print(f"📥 {len(patients)} pacientes activos cargados para comparación aproximada")
+    clusters = find_fuzzy_duplicates(patients)
+    
+    results = []
+    for group_id, members in enumerate(sorted(clusters, key=lambda m: min(p['name_key'] for p in m)), 1):
+        members.sort(key=lambda p: p['created_at'] or datetime.min, reverse=True)
+        for patient in members:
+            patient['grupo'] = group_id
+            patient['total_duplicados'] = len(members)
+            results.append(patient)
+    
+    return results
+
+def analyze_duplicates(duplicates, group_key='name'):
     """Analiza duplicados y determina cuál conservar"""
-    # Agrupar por nombre
+    # Agrupar por nombre (o por grupo de similitud en modo aproximado)
     groups = {}
     for patient in duplicates:
-        name = patient['name']
+        name = patient[group_key]
         if name not in groups:
             groups[name] = []
         groups[name].append(patient)
@@ -103,16 +310,19 @@ def analyze_duplicates(duplicates):
     
     return recommendations
 
-def export_to_csv(recommendations, filename):
-    """Exporta las recomendaciones a CSV"""
+def export_to_csv(recommendations, filename, group_key='name'):
+    """Exporta las recomendaciones a CSV (con la columna grupo en modo aproximado)"""
     fieldnames = [
         'id', 'name', 'document', 'phone', 'email', 'birth_date', 
         'gender', 'address', 'eps_name', 'zone_name', 'created_at',
         'total_duplicados', 'recomendacion', 'razon'
     ]
+    # Los grupos aproximados unen nombres distintos: sin el grupo no se sabe qué filas van juntas
+    if group_key == 'grupo':
+        fieldnames.insert(0, 'grupo')
     
     with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
         writer.writeheader()
         
         for rec in recommendations:
@@ -127,7 +337,7 @@ def export_to_csv(recommendations, filename):
     
     print(f"✅ Archivo exportado: {filename}")
 
-def print_summary(recommendations):
+def print_summary(recommendations, group_key='name'):
     """Imprime un resumen del análisis"""
     total = len(recommendations)
     conservar = sum(1 for r in recommendations if r['recomendacion'] == 'CONSERVAR')
@@ -148,33 +358,44 @@ def print_summary(recommendations):
     current_name = None
     examples = 0
     for rec in recommendations:
-        if rec['name'] != current_name:
+        if rec[group_key] != current_name:
             if examples >= 5:  # Mostrar solo 5 ejemplos
                 break
-            current_name = rec['name']
+            current_name = rec[group_key]
             examples += 1
             print(f"\n👤 {rec['name']} (Total: {rec['total_duplicados']})")
         
         icon = "✅" if rec['recomendacion'] == 'CONSERVAR' else "❌"
-        print(f"  {icon} ID: {rec['id']} | Doc: {rec['document']} | Tel: {rec['phone']}")
+        name_str = f" | {rec['name']}" if group_key != 'name' else ""
+        print(f"  {icon} ID: {rec['id']}{name_str} | Doc: {rec['document']} | Tel: {rec['phone']}")
         print(f"     {rec['razon']}")
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Analizar pacientes duplicados y generar recomendaciones")
+    parser.add_argument('--fuzzy', action='store_true',
+                        help="Detectar duplicados aproximados (tildes, orden de nombres, errores de digitación)")
+    args = parser.parse_args()
+    
     print("🔍 Analizando pacientes duplicados...")
     
     # Obtener duplicados
-    duplicates = get_duplicates()
+    if args.fuzzy:
+        duplicates = get_fuzzy_duplicates()
+        group_key = 'grupo'
+    else:
+        duplicates = get_duplicates()
+        group_key = 'name'
     print(f"📊 Se encontraron {len(duplicates)} registros duplicados")
     
     # Analizar y generar recomendaciones
-    recommendations = analyze_duplicates(duplicates)
+    recommendations = analyze_duplicates(duplicates, group_key)
     
     # Exportar a CSV
     output_file = '/home/ubuntu/app/pacientes_duplicados_analisis.csv'
-    export_to_csv(recommendations, output_file)
+    export_to_csv(recommendations, output_file, group_key)
     
     # Mostrar resumen
-    print_summary(recommendations)
+    print_summary(recommendations, group_key)
     
     print(f"\n📄 Archivo CSV generado: {output_file}")
     print("🔍 Revisa el archivo para decidir qué registros eliminar")
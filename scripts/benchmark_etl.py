@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Benchmark de las etapas de importación de pacientes y CUPS
+
+Genera entradas sintéticas (synthetic_data.py) para cada tamaño, ejecuta cada
+etapa en un proceso nuevo para que el pico de memoria sea solo de esa etapa, y
+guarda en JSON el tiempo total, las filas por segundo, el pico de RSS y el
+desglose por paso. Con --compare se contrasta contra un resultado anterior.
+"""
+
+import argparse
+import csv
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import resource
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SCRIPTS_DIR)
+BACKEND_SCRIPTS_DIR = os.path.join(REPO_ROOT, 'backend', 'scripts')
+
+# import_socorro.py vive en la raíz del repositorio
+for path in (SCRIPTS_DIR, REPO_ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import synthetic_data
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), 'etl_benchmark_data')
+DEFAULT_OUTPUT = 'benchmark_results.json'
+
+class StageTimer:
+    """Tiempos por paso de una etapa; los pasos de preparación no cuentan en el total"""
+
+    def __init__(self):
+        self.steps = {}
+        self.setup_steps = set()
+
+    @contextmanager
+    def step(self, name, setup=False):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[name] = self.steps.get(name, 0.0) + time.perf_counter() - start
+            if setup:
+                self.setup_steps.add(name)
+
+    def measured_seconds(self):
+        return sum(seconds for name, seconds in self.steps.items() if name not in self.setup_steps)
+
+def load_backend_script(name):
+    """Importar un script de backend/scripts (los nombres con guiones no se importan con import)"""
+    # Los scripts de CUPS importan sus módulos compartidos (cups_parser, cups_sql...)
+    if BACKEND_SCRIPTS_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_SCRIPTS_DIR)
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'),
+                                                  os.path.join(BACKEND_SCRIPTS_DIR, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def bench_identify_zone(input_path, rows, data_dir, seed, timer):
+    from reorganize_names_with_zone import classify_normalized_address, identify_zone
+
+    with timer.step('read_csv', setup=True):
+        with open(input_path, 'r', encoding='iso-8859-1') as file:
+            addresses = [row['DIRECCION RESIDENCIA'] for row in csv.DictReader(file)]
+
+    classify_normalized_address.cache_clear()
+    with timer.step('classify'):
+        for address in addresses:
+            identify_zone(address)
+    return len(addresses)
+
+def bench_parse_date(input_path, rows, data_dir, seed, timer):
+    from import_csv_to_patients import parse_date
+
+    with timer.step('read_csv', setup=True):
+        with open(input_path, 'r', encoding='utf-8') as file:
+            dates = [row['FECHA NACIMIENTO'] for row in csv.DictReader(file)]
+
+    with timer.step('parse'):
+        for value in dates:
+            parse_date(value)
+    return len(dates)
+
+def bench_process_csv_to_sql(input_path, rows, data_dir, seed, timer):
+    import import_socorro
+
+    output_path = os.path.join(data_dir, f"import_socorro_{rows}.sql")
+    try:
+        with timer.step('generate_sql'):
+            total_rows, _, errors, _ = import_socorro.process_csv_to_sql(output_path, csv_path=input_path)
+    finally:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+    return total_rows + len(errors)
+
+def bench_analyze_duplicates(input_path, rows, data_dir, seed, timer):
+    from analyze_duplicates import analyze_duplicates, export_to_csv
+
+    with timer.step('generate', setup=True):
+        duplicates = synthetic_data.generate_duplicate_candidates(rows, seed)
+
+    with timer.step('analyze'):
+        recommendations = analyze_duplicates(duplicates)
+
+    output_path = os.path.join(data_dir, f"duplicados_{rows}.csv")
+    try:
+        with timer.step('export_csv'):
+            export_to_csv(recommendations, output_path)
+    finally:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+    return len(duplicates)
+
+def bench_cups_pdf(input_path, rows, data_dir, seed, timer):
+    module = load_backend_script('parse-cups-pdf')
+
+    with timer.step('parse'):
+        records = module.parse_cups_data(input_path)
+    with timer.step('generate_sql'):
+        module.generate_sql(records)
+    return rows
+
+def bench_cups_simple(input_path, rows, data_dir, seed, timer):
+    module = load_backend_script('parse-cups-simple')
+
+    with timer.step('parse'):
+        records = module.parse_cups_simple(input_path)
+    with timer.step('generate_sql'):
+        module.generate_sql_bulk(records)
+    return rows
+
+# Etapa -> (tipo de entrada en synthetic_data.GENERATORS o None, función)
+STAGES = {
+    'identify_zone': ('database', bench_identify_zone),
+    'parse_date': ('patients', bench_parse_date),
+    'process_csv_to_sql': ('socorro', bench_process_csv_to_sql),
+    'analyze_duplicates': (None, bench_analyze_duplicates),
+    'cups_pdf': ('cups', bench_cups_pdf),
+    'cups_simple': ('cups', bench_cups_simple),
+}
+
+def ensure_input(kind, rows, data_dir, seed, inputs):
+    """Generar (o reutilizar) el archivo sintético de un tipo y tamaño"""
+    writer, pattern = synthetic_data.GENERATORS[kind]
+    path = os.path.join(data_dir, f"seed{seed}_" + pattern.format(rows=rows))
+    key = f"{kind}_{rows}"
+    if key in inputs:
+        return path
+
+    generation_seconds = None
+    if not os.path.exists(path):
+        print(f"   🧪 Generando {os.path.basename(path)}...")
+        start = time.perf_counter()
+        writer(path + '.tmp', rows, seed)
+        os.replace(path + '.tmp', path)
+        generation_seconds = round(time.perf_counter() - start, 3)
+
+    inputs[key] = {'path': path, 'bytes': os.path.getsize(path), 'generation_seconds': generation_seconds}
+    return path
+
+def run_stage(stage, input_path, rows, data_dir, seed, results):
+    """Proceso hijo: ejecutar una etapa y reportar tiempos y memoria"""
+    start_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timer = StageTimer()
+    processed = STAGES[stage][1](input_path, rows, data_dir, seed, timer)
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    seconds = timer.measured_seconds()
+    results.put({
+        'stage': stage,
+        'rows': rows,
+        'processed': processed,
+        'seconds': round(seconds, 4),
+        'rows_per_second': round(processed / seconds, 1) if seconds > 0 else None,
+        'peak_rss_kb': peak_rss_kb,
+        'rss_growth_kb': peak_rss_kb - start_rss_kb,
+        'breakdown': {name: round(value, 4) for name, value in timer.steps.items()},
+        'setup_steps': sorted(timer.setup_steps),
+    })
+
+def wait_for_result(process, result_queue):
+    """Resultado del proceso hijo, o None si terminó sin reportarlo"""
+    while True:
+        try:
+            return result_queue.get(timeout=1)
+        except queue.Empty:
+            if not process.is_alive():
+                return None
+
+def run_benchmarks(stages, sizes, data_dir, seed):
+    """Ejecutar cada etapa para cada tamaño, cada una en un proceso nuevo"""
+    os.makedirs(data_dir, exist_ok=True)
+    context = multiprocessing.get_context('spawn')
+    inputs = {}
+    results = []
+
+    for rows in sizes:
+        print(f"\n📏 Tamaño: {rows} filas")
+        for stage in stages:
+            kind = STAGES[stage][0]
+            input_path = ensure_input(kind, rows, data_dir, seed, inputs) if kind else None
+
+            result_queue = context.Queue()
+            process = context.Process(target=run_stage, args=(stage, input_path, rows, data_dir, seed, result_queue))
+            process.start()
+            result = wait_for_result(process, result_queue)
+            process.join()
+            if result is None or process.exitcode != 0:
+                print(f"   ❌ {stage}: el proceso terminó con código {process.exitcode}")
+                results.append({'stage': stage, 'rows': rows, 'error': f"exit code {process.exitcode}"})
+                continue
+
+            results.append(result)
+            print(f"   ⏱️  {stage}: {result['seconds']:.3f}s | {result['rows_per_second'] or 0:,.0f} filas/s | "
+                  f"pico RSS {result['peak_rss_kb'] / 1024:.1f} MiB")
+
+    return inputs, results
+
+def compare_results(previous, current):
+    """Imprimir la variación de tiempo por etapa y tamaño contra un resultado anterior"""
+    before = {(r['stage'], r['rows']): r for r in previous['results'] if 'seconds' in r}
+    print("\n📊 Comparación con el resultado anterior:")
+    print(f"   {'etapa':<20} {'filas':>9} {'antes (s)':>10} {'ahora (s)':>10} {'cambio':>8}")
+    for result in current['results']:
+        old = before.get((result['stage'], result['rows']))
+        if not old or 'seconds' not in result:
+            continue
+        change = (result['seconds'] / old['seconds'] - 1) * 100 if old['seconds'] else 0.0
+        print(f"   {result['stage']:<20} {result['rows']:>9} {old['seconds']:>10.3f} "
+              f"{result['seconds']:>10.3f} {change:>+7.1f}%")
+
+def parse_args():
+    """Leer argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Medir las etapas de importación con datos sintéticos")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help=f"Tamaños en filas (por defecto: {' '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES),
+                        help="Etapas a medir (por defecto: todas)")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR,
+                        help=f"Directorio de los archivos sintéticos, reutilizados entre corridas (por defecto: {DEFAULT_DATA_DIR})")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla de los datos sintéticos (por defecto: 0)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help=f"Archivo JSON de resultados (por defecto: {DEFAULT_OUTPUT})")
+    parser.add_argument('--compare', default=None, help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args()
+    if any(size < 1 for size in args.sizes):
+        parser.error("--sizes deben ser mayores que 0")
+    return args
+
+def main():
+    args = parse_args()
+
+    print("🏁 Benchmark de importación")
+    print(f"📂 Datos sintéticos: {args.data_dir}")
+    print(f"📋 Etapas: {', '.join(args.stages)}")
+
+    inputs, results = run_benchmarks(args.stages, args.sizes, args.data_dir, args.seed)
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': args.seed,
+        'sizes': args.sizes,
+        'inputs': inputs,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultados guardados en {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            compare_results(json.load(file), report)
+
+    return 0 if all('error' not in result for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
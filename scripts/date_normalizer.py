@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Normalización de fechas de nacimiento compartida por los importadores de pacientes.
+
+Cada formato se reconoce con una expresión precompilada equivalente a la de
+datetime.strptime y se valida con aritmética entera (mes, día del mes, año
+bisiesto), sin excepciones por fila. Los valores repetidos se resuelven desde
+un caché y el formato dominante de la columna se detecta con una muestra.
+"""
+
+import functools
+import re
+
+# Sub-expresiones equivalentes a las de datetime.strptime para %Y, %y, %m y %d
+YEAR_4 = r'(?P<year>\d\d\d\d)'
+YEAR_2 = r'(?P<year>\d\d)'
+MONTH = r'(?P<month>1[0-2]|0[1-9]|[1-9])'
+DAY = r'(?P<day>3[01]|[12]\d|0[1-9]|[1-9]| [1-9])'
+
+# Formatos soportados: nombre -> (patrón, año de dos dígitos)
+DATE_FORMATS = {
+    'DD/MM/YYYY': (f'{DAY}/{MONTH}/{YEAR_4}', False),
+    'DD/MM/YY': (f'{DAY}/{MONTH}/{YEAR_2}', True),
+    'YYYY/MM/DD': (f'{YEAR_4}/{MONTH}/{DAY}', False),
+    'YYYY-MM-DD': (f'{YEAR_4}-{MONTH}-{DAY}', False),
+}
+
+DAYS_IN_MONTH = [0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+# Cadenas distintas recordadas por el caché de cada normalizador
+DATE_CACHE_SIZE = 65536
+# Valores observados antes de reordenar los formatos por frecuencia
+SNIFF_SAMPLE_SIZE = 1000
+
+def is_valid_date(year, month, day):
+    """Validar una fecha con enteros (año >= 1, día dentro del mes, bisiestos)"""
+    if year < 1 or not 1 <= month <= 12 or day < 1:
+        return False
+    leap = year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+    return day <= DAYS_IN_MONTH[month] + (1 if month == 2 and leap else 0)
+
+def format_date(year, month, day):
+    """Fecha como YYYY-MM-DD (el año sin relleno, igual que strftime('%Y') en Linux)"""
+    return f"{year}-{month:02d}-{day:02d}"
+
+class DateNormalizer:
+    """
+    Normalizador de fechas para una columna con uno o varios formatos posibles.
+    Los formatos se prueban del más frecuente al menos frecuente; el orden se
+    ajusta una vez, tras observar los primeros SNIFF_SAMPLE_SIZE valores.
+    """
+
+    def __init__(self, formats, cache_size=DATE_CACHE_SIZE, sample_size=SNIFF_SAMPLE_SIZE):
+        self.formats = [(name, re.compile(f'^{DATE_FORMATS[name][0]}$'), DATE_FORMATS[name][1])
+                        for name in formats]
+        self.sample_size = sample_size
+        self.matches = {name: 0 for name in formats}
+        self.rejects = {name: 0 for name in formats}
+        self.rejects['sin formato'] = 0
+        self.observed = 0
+        self._parse_cached = functools.lru_cache(maxsize=cache_size)(self._parse_uncached)
+
+    def _parse_uncached(self, value):
+        """Retorna ((año, mes, día) o None, formato reconocido o None)"""
+        for name, pattern, two_digit_year in self.formats:
+            match = pattern.match(value)
+            if not match:
+                continue
+            year = int(match.group('year'))
+            if two_digit_year:
+                # Pivote de %y: 69-99 -> 1900, 00-68 -> 2000
+                year += 1900 if year >= 69 else 2000
+            month = int(match.group('month'))
+            day = int(match.group('day'))
+            if is_valid_date(year, month, day):
+                return (year, month, day), name
+            return None, name
+        return None, None
+
+    def parse(self, value):
+        """Retorna (año, mes, día) o None si el valor no es una fecha válida en ningún formato"""
+        if not value:
+            return None
+        value = value.strip()
+        if not value:
+            return None
+
+        parsed, name = self._parse_cached(value)
+        if name is None:
+            self.rejects['sin formato'] += 1
+        else:
+            self.matches[name] += 1
+            if parsed is None:
+                self.rejects[name] += 1
+
+        self.observed += 1
+        if self.observed == self.sample_size:
+            # Formato dominante primero según lo observado en la muestra
+            self.formats.sort(key=lambda fmt: self.matches[fmt[0]], reverse=True)
+            self._parse_cached.cache_clear()
+
+        return parsed
+
+    def normalize(self, value):
+        """Fecha como YYYY-MM-DD o None"""
+        parsed = self.parse(value)
+        return format_date(*parsed) if parsed else None
+
+    def cache_info(self):
+        """Aciertos y fallos del caché de cadenas"""
+        return self._parse_cached.cache_info()
+
+    def reject_summary(self):
+        """Rechazos por formato (solo los que tienen al menos uno)"""
+        return {name: count for name, count in self.rejects.items() if count}
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Acceso compartido a MySQL para los scripts de scripts/
+
+Configuración desde variables de entorno (las mismas del backend: DB_HOST,
+DB_PORT, DB_USER, DB_PASS, DB_NAME; DB_PASS es obligatoria), un pool de conexiones por proceso para
+que los pasos encadenados reutilicen conexiones abiertas, cursores preparados
+por sentencia y un helper de ejecución por lotes.
+"""
+
+import os
+import weakref
+
+from mysql.connector import Error
+from mysql.connector.pooling import MySQLConnectionPool
+
+# Configuración de la base de datos
+DB_CONFIG = {
+    'host': os.environ.get('DB_HOST', '127.0.0.1'),
+    'port': int(os.environ.get('DB_PORT', '3306')),
+    'user': os.environ.get('DB_USER', 'biosanar_user'),
+    'password': os.environ.get('DB_PASS'),
+    'database': os.environ.get('DB_NAME', 'biosanar')
+}
+
+# Conexiones abiertas por pool (cada conjunto de opciones tiene su propio pool)
+POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '2'))
+# Filas por executemany en execute_batches()
+EXECUTE_BATCH_SIZE = 1000
+
+# Pools del proceso actual: {opciones: pool}. Un proceso hijo no reutiliza
+# las conexiones heredadas del padre, crea las suyas.
+_pools = {}
+_pools_pid = None
+# Cursores preparados: {conexión: {sentencia: cursor}}
+_cursors = weakref.WeakKeyDictionary()
+
+def get_pool(**options):
+    """Pool de conexiones para DB_CONFIG más options (p. ej. allow_local_infile=True)"""
+    global _pools_pid
+    if _pools_pid != os.getpid():
+        _pools.clear()
+        _pools_pid = os.getpid()
+
+    if DB_CONFIG['password'] is None:
+        raise Error("La variable de entorno DB_PASS no está definida")
+
+    key = tuple(sorted(options.items()))
+    if key not in _pools:
+        _pools[key] = MySQLConnectionPool(pool_name=f"scripts_{os.getpid()}_{len(_pools)}",
+                                          pool_size=POOL_SIZE, pool_reset_session=True,
+                                          **DB_CONFIG, **options)
+    return _pools[key]
+
+def get_connection(**options):
+    """Conexión del pool; close() la devuelve al pool. Lanza Error si no se puede conectar."""
+    return get_pool(**options).get_connection()
+
+def connect_db(**options):
+    """Conectar a la base de datos (options se agregan a DB_CONFIG). Retorna None si falla."""
+    try:
+        conn = get_connection(**options)
+        if conn.is_connected():
+            print("✅ Conexión exitosa a la base de datos")
+            return conn
+    except Error as e:
+        print(f"❌ Error al conectar a la base de datos: {e}")
+        return None
+
+def prepared_cursor(conn, sql):
+    """
+    Cursor preparado dedicado a la sentencia sql de una conexión. El conector
+    vuelve a preparar la sentencia cada vez que un cursor preparado recibe un
+    texto distinto al anterior, así que cada sentencia tiene su propio cursor:
+    se prepara una sola vez en el servidor y se reejecuta con nuevos parámetros.
+    No se cierra: se libera junto con la conexión.
+    """
+    cursors = _cursors.setdefault(conn, {})
+    if sql not in cursors:
+        cursors[sql] = conn.cursor(prepared=True)
+    return cursors[sql]
+
+def execute_batches(cursor, sql, rows, batch_size=EXECUTE_BATCH_SIZE, on_batch=None):
+    """
+    Ejecutar sql con executemany en lotes de batch_size filas (el conector agrupa
+    los INSERT ... VALUES de cada lote en una sola sentencia multi-fila).
+    on_batch(filas enviadas) se llama tras cada lote. Retorna el total de filas enviadas.
+    """
+    sent = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            cursor.executemany(sql, batch)
+            sent += len(batch)
+            batch = []
+            if on_batch:
+                on_batch(sent)
+
+    if batch:
+        cursor.executemany(sql, batch)
+        sent += len(batch)
+        if on_batch:
+            on_batch(sent)
+
+    return sent
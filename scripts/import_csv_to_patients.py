@@ -3,48 +3,28 @@
 Script para importar pacientes del CSV san_gil.csv a la tabla patients_cp
 """
 
+import argparse
 import csv
-import mysql.connector
+import hashlib
+import json
+import multiprocessing
+import queue
+import sqlite3
 from mysql.connector import Error
-from datetime import datetime
+import os
 import sys
+import tempfile
+import zlib
 
-# Configuración de la base de datos
-DB_CONFIG = {
-    'host': '127.0.0.1',
-    'port': 3306,
-    'user': 'biosanar_user',
-    'password': '/6Tx0eXqFQONTFuoc7aqPicNlPhmuINU',
-    'database': 'biosanar'
-}
-
-def connect_db():
-    """Conectar a la base de datos"""
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        if conn.is_connected():
-            print("✅ Conexión exitosa a la base de datos")
-            return conn
-    except Error as e:
-        print(f"❌ Error al conectar a la base de datos: {e}")
-        return None
+from date_normalizer import DateNormalizer
+from db import connect_db, prepared_cursor
+
+# FECHA NACIMIENTO llega como DD/MM/YYYY o DD/MM/YY
+BIRTH_DATES = DateNormalizer(['DD/MM/YYYY', 'DD/MM/YY'])
 
 def parse_date(date_str):
-    """Convertir fecha del formato DD/MM/YYYY a YYYY-MM-DD"""
-    if not date_str or date_str.strip() == '':
-        return None
-    
-    try:
-        # Intentar formato DD/MM/YYYY
-        date_obj = datetime.strptime(date_str.strip(), '%d/%m/%Y')
-        return date_obj.strftime('%Y-%m-%d')
-    except:
-        try:
-            # Intentar formato DD/MM/YY
-            date_obj = datetime.strptime(date_str.strip(), '%d/%m/%y')
-            return date_obj.strftime('%Y-%m-%d')
-        except:
-            return None
+    """Convertir fecha del formato DD/MM/YYYY (o DD/MM/YY) a YYYY-MM-DD"""
+    return BIRTH_DATES.normalize(date_str)
 
 def parse_gender(gender_str):
     """Convertir género del CSV al formato de la BD"""
@@ -59,132 +39,929 @@ def parse_gender(gender_str):
     else:
         return 'No especificado'
 
-def import_patients(csv_file, conn):
+def extract_patient(row):
+    """
+    Normalizar una fila del CSV a la tupla de columnas de patients_cp.
+    Retorna None si la fila no tiene documento (se omite).
+    """
+    document = row.get('document', '').strip()
+    if not document:
+        return None
+    
+    full_name = row.get('full_name', '').strip()
+    phone = row.get('TELEFONO RESIDENCIA', '').strip()
+    birth_date = parse_date(row.get('FECHA NACIMIENTO', ''))
+    gender = parse_gender(row.get('TIPO SEXO', ''))
+    address = row.get('DIRECCION RESIDENCIA', '').strip()
+    zone_id = row.get('zona', '').strip()  # Será 4 para San Gil
+    insurance_eps_id = row.get('insurance_eps_id', '').strip()
+    
+    # Convertir zone_id e insurance_eps_id a números o NULL
+    zone_id = int(zone_id) if zone_id and zone_id.isdigit() else None
+    insurance_eps_id = int(insurance_eps_id) if insurance_eps_id and insurance_eps_id.isdigit() else None
+    
+    return (document, full_name, phone, birth_date, gender, address, zone_id, insurance_eps_id)
+
+def iter_patients(csv_file):
+    """
+    Recorrer el CSV aplicando extract_patient() fila a fila.
+    Genera (número de fila, documento, paciente, error); paciente None sin error es fila omitida.
+    """
+    with open(csv_file, 'r', encoding='utf-8') as file:
+        reader = csv.DictReader(file)
+        
+        for row_num, row in enumerate(reader, start=2):
+            document = (row.get('document') or '').strip()
+            try:
+                yield row_num, document, extract_patient(row), None
+            except Exception as e:
+                yield row_num, document, None, e
+
+class ResumablePatientReader:
+    """
+    Igual que iter_patients(), pero registra el byte y el número de la
+    última fila leída para poder continuar desde un checkpoint con seek().
+    """
+    
+    def __init__(self, csv_file, offset=None, row_num=1):
+        self.csv_file = csv_file
+        self.offset = offset    # Bytes consumidos hasta el final de la última fila leída
+        self.row_num = row_num  # Número de la última fila leída (1 = encabezado)
+    
+    def _lines(self, file):
+        """Líneas decodificadas; csv.reader las pide una a una, sin leer por adelantado"""
+        for line in iter(file.readline, b''):
+            self.offset += len(line)
+            yield line.decode('utf-8')
+    
+    def __iter__(self):
+        with open(self.csv_file, 'rb') as file:
+            fieldnames = next(csv.reader([file.readline().decode('utf-8')]))
+            if self.offset is None:
+                self.offset = file.tell()
+            else:
+                file.seek(self.offset)
+            
+            for row in csv.DictReader(self._lines(file), fieldnames=fieldnames):
+                self.row_num += 1
+                document = (row.get('document') or '').strip()
+                try:
+                    yield self.row_num, document, extract_patient(row), None
+                except Exception as e:
+                    yield self.row_num, document, None, e
+
+# Bytes iniciales del CSV incluidos en la huella del checkpoint
+FINGERPRINT_BYTES = 1024 * 1024
+
+def file_fingerprint(csv_file):
+    """Huella del CSV: tamaño, fecha de modificación y SHA-256 del primer MiB"""
+    stat = os.stat(csv_file)
+    with open(csv_file, 'rb') as file:
+        digest = hashlib.sha256(file.read(FINGERPRINT_BYTES)).hexdigest()
+    return f"{stat.st_size}:{stat.st_mtime_ns}:{digest}"
+
+class ImportCheckpoint:
+    """
+    Checkpoint JSON escrito de forma atómica tras cada commit: huella del CSV,
+    byte y fila de la última fila confirmada y contadores acumulados.
+    """
+    
+    def __init__(self, path, csv_file):
+        self.path = path
+        self.csv_file = csv_file
+        self.fingerprint = file_fingerprint(csv_file)
+    
+    def load(self):
+        """Estado guardado, o None si no hay checkpoint. ValueError si el CSV cambió."""
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'r', encoding='utf-8') as file:
+            state = json.load(file)
+        if state.get('fingerprint') != self.fingerprint:
+            raise ValueError(f"El checkpoint {self.path} corresponde a otra versión de {self.csv_file}")
+        return state
+    
+    def save(self, reader, inserted, updated, errors, skipped):
+        """Guardar la posición del lector y los contadores (temporal + os.replace)"""
+        state = {
+            'csv_file': os.path.abspath(self.csv_file),
+            'fingerprint': self.fingerprint,
+            'offset': reader.offset,
+            'row_num': reader.row_num,
+            'inserted': inserted,
+            'updated': updated,
+            'errors': errors,
+            'skipped': skipped,
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.checkpoint-', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(state, file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+    
+    def clear(self):
+        """Eliminar el checkpoint al terminar la importación"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def save_checkpoint(checkpoint, reader, inserted, updated, errors, skipped):
+    """
+    Guardar el checkpoint tras un commit. Si falla (disco lleno, permisos) se
+    informa y se retorna False para detener la importación: seguir sin
+    checkpoint válido haría que --resume repitiera o saltara filas.
+    """
+    try:
+        checkpoint.save(reader, inserted, updated, errors, skipped)
+        return True
+    except OSError as e:
+        print(f"\n❌ No se pudo guardar el checkpoint {checkpoint.path}: {e}")
+        print(f"   Las filas hasta la {reader.row_num} ya están confirmadas en la base de datos; "
+              f"la importación se detiene.")
+        print("   Corrija el problema y continúe con --resume desde el checkpoint anterior.")
+        return False
+
+def start_from_checkpoint(csv_file, checkpoint, resume):
+    """
+    Lector y contadores iniciales (insertados, actualizados, errores, omitidos).
+    Con resume se continúa desde la última fila confirmada del checkpoint.
+    """
+    state = checkpoint.load() if checkpoint and resume else None
+    if not state:
+        if resume:
+            print("ℹ️  No hay checkpoint previo, se importa desde el inicio")
+        return ResumablePatientReader(csv_file), (0, 0, 0, 0)
+    
+    print(f"⏩ Reanudando desde la fila {state['row_num']} (byte {state['offset']})")
+    reader = ResumablePatientReader(csv_file, state['offset'], state['row_num'])
+    return reader, (state['inserted'], state['updated'], state['errors'], state['skipped'])
+
+def print_import_summary(cursor, inserted, updated, errors, skipped, unchanged=None):
+    """Mostrar el resumen final de la importación y estadísticas de patients_cp"""
+    print(f"\n\n✅ PROCESO COMPLETADO:")
+    print(f"   ✅ Pacientes insertados: {inserted}")
+    print(f"   🔄 Pacientes actualizados: {updated}")
+    if unchanged is not None:
+        print(f"   💤 Sin cambios (no enviados): {unchanged}")
+    print(f"   ⚠️  Errores: {errors}")
+    print(f"   ⏭️  Omitidos (sin documento): {skipped}")
+    print(f"   📊 Total procesado: {inserted + updated + errors + skipped + (unchanged or 0)}")
+    for date_format, count in BIRTH_DATES.reject_summary().items():
+        print(f"   📅 Fechas de nacimiento descartadas ({date_format}): {count}")
+    
+    # Mostrar estadísticas de la tabla
+    print("\n📊 Estadísticas de patients_cp:")
+    cursor.execute("SELECT COUNT(*) FROM patients_cp")
+    total = cursor.fetchone()[0]
+    print(f"   Total de pacientes: {total}")
+    
+    cursor.execute("SELECT COUNT(*) FROM patients_cp WHERE zone_id = 4")
+    zone_4 = cursor.fetchone()[0]
+    print(f"   Pacientes zona San Gil (zone_id=4): {zone_4}")
+    
+    cursor.execute("SELECT COUNT(*) FROM patients_cp WHERE insurance_eps_id = 12")
+    eps_12 = cursor.fetchone()[0]
+    print(f"   Pacientes con EPS 12: {eps_12}")
+
+# Sentencias por fila de import_patients()
+SELECT_PATIENT_SQL = "SELECT id FROM patients_cp WHERE document = %s"
+UPDATE_PATIENT_SQL = """
+    UPDATE patients_cp 
+    SET name = %s,
+        phone = %s,
+        birth_date = %s,
+        gender = %s,
+        address = %s,
+        zone_id = %s,
+        insurance_eps_id = %s,
+        status = 'Activo'
+    WHERE id = %s
+"""
+INSERT_PATIENT_SQL = """
+    INSERT INTO patients_cp 
+    (document, name, phone, birth_date, gender, address, zone_id, insurance_eps_id, status)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'Activo')
+"""
+
+def import_patients(csv_file, conn, checkpoint=None, resume=False):
     """Importar pacientes del CSV a la base de datos"""
     cursor = conn.cursor()
+    # SELECT / UPDATE / INSERT por fila: un cursor preparado por sentencia
+    select_cursor = prepared_cursor(conn, SELECT_PATIENT_SQL)
+    update_cursor = prepared_cursor(conn, UPDATE_PATIENT_SQL)
+    insert_cursor = prepared_cursor(conn, INSERT_PATIENT_SQL)
     
     try:
-        with open(csv_file, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
+        reader, (inserted, updated, errors, skipped) = start_from_checkpoint(csv_file, checkpoint, resume)
+        
+        print("\n🔄 Importando pacientes del CSV a patients_cp...\n")
+        
+        for row_num, document, patient, error in reader:
+            if error is not None:
+                errors += 1
+                print(f"\n⚠️  Error en fila {row_num} (Doc: {document}): {error}")
+                continue
             
-            inserted = 0
-            updated = 0
-            errors = 0
-            skipped = 0
+            try:
+                # Validar documento
+                if patient is None:
+                    skipped += 1
+                    continue
+                
+                document, full_name, phone, birth_date, gender, address, zone_id, insurance_eps_id = patient
+                
+                # Verificar si el paciente ya existe
+                select_cursor.execute(SELECT_PATIENT_SQL, (document,))
+                existing = select_cursor.fetchone()
+                
+                if existing:
+                    # Actualizar paciente existente
+                    patient_id = existing[0]
+                    update_cursor.execute(UPDATE_PATIENT_SQL, (full_name, phone, birth_date, gender, address, zone_id, insurance_eps_id, patient_id))
+                    updated += 1
+                else:
+                    # Insertar nuevo paciente
+                    insert_cursor.execute(INSERT_PATIENT_SQL, (document, full_name, phone, birth_date, gender, address, zone_id, insurance_eps_id))
+                    inserted += 1
             
-            print("\n🔄 Importando pacientes del CSV a patients_cp...\n")
+            except Exception as e:
+                errors += 1
+                print(f"\n⚠️  Error en fila {row_num} (Doc: {document}): {e}")
+                continue
             
-            for row_num, row in enumerate(reader, start=2):
-                try:
-                    # Extraer datos del CSV
-                    document = row.get('document', '').strip()
-                    full_name = row.get('full_name', '').strip()
-                    phone = row.get('TELEFONO RESIDENCIA', '').strip()
-                    birth_date = parse_date(row.get('FECHA NACIMIENTO', ''))
-                    gender = parse_gender(row.get('TIPO SEXO', ''))
-                    address = row.get('DIRECCION RESIDENCIA', '').strip()
-                    zone_id = row.get('zona', '').strip()  # Será 4 para San Gil
-                    insurance_eps_id = row.get('insurance_eps_id', '').strip()
-                    
-                    # Validar documento
-                    if not document:
-                        skipped += 1
-                        continue
-                    
-                    # Convertir zone_id e insurance_eps_id a números o NULL
-                    zone_id = int(zone_id) if zone_id and zone_id.isdigit() else None
-                    insurance_eps_id = int(insurance_eps_id) if insurance_eps_id and insurance_eps_id.isdigit() else None
-                    
-                    # Verificar si el paciente ya existe
-                    cursor.execute("SELECT id FROM patients_cp WHERE document = %s", (document,))
-                    existing = cursor.fetchone()
-                    
-                    if existing:
-                        # Actualizar paciente existente
-                        patient_id = existing[0]
-                        cursor.execute("""
-                            UPDATE patients_cp 
-                            SET name = %s,
-                                phone = %s,
-                                birth_date = %s,
-                                gender = %s,
-                                address = %s,
-                                zone_id = %s,
-                                insurance_eps_id = %s,
-                                status = 'Activo'
-                            WHERE id = %s
-                        """, (full_name, phone, birth_date, gender, address, zone_id, insurance_eps_id, patient_id))
-                        updated += 1
-                    else:
-                        # Insertar nuevo paciente
-                        cursor.execute("""
-                            INSERT INTO patients_cp 
-                            (document, name, phone, birth_date, gender, address, zone_id, insurance_eps_id, status)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'Activo')
-                        """, (document, full_name, phone, birth_date, gender, address, zone_id, insurance_eps_id))
-                        inserted += 1
-                    
-                    # Commit cada 100 registros
-                    if (inserted + updated) % 100 == 0:
-                        conn.commit()
-                        print(f"   Procesados: {inserted + updated + errors + skipped} | Insertados: {inserted} | Actualizados: {updated} | Errores: {errors} | Omitidos: {skipped}", end='\r')
-                
-                except Exception as e:
-                    errors += 1
-                    print(f"\n⚠️  Error en fila {row_num} (Doc: {document}): {e}")
-                    continue
+            # Commit cada 100 registros, fuera del manejo de errores por fila: un
+            # fallo aquí no es de la fila, que ya se escribió
+            if (inserted + updated) % 100 == 0:
+                conn.commit()
+                if checkpoint and not save_checkpoint(checkpoint, reader, inserted, updated, errors, skipped):
+                    return False
+                print(f"   Procesados: {inserted + updated + errors + skipped} | Insertados: {inserted} | Actualizados: {updated} | Errores: {errors} | Omitidos: {skipped}", end='\r')
+        
+        # Commit final
+        conn.commit()
+        if checkpoint:
+            checkpoint.clear()
+        
+        print_import_summary(cursor, inserted, updated, errors, skipped)
+        
+        return True
             
-            # Commit final
+    except Exception as e:
+        print(f"❌ Error al importar pacientes: {e}")
+        import traceback
+        traceback.print_exc()
+        conn.rollback()
+        return False
+    finally:
+        cursor.close()
+
+UPSERT_COLUMNS = "(document, name, phone, birth_date, gender, address, zone_id, insurance_eps_id, status)"
+UPSERT_ROW = "(%s, %s, %s, %s, %s, %s, %s, %s, 'Activo')"
+UPSERT_ON_DUPLICATE = """
+    ON DUPLICATE KEY UPDATE
+        name = VALUES(name),
+        phone = VALUES(phone),
+        birth_date = VALUES(birth_date),
+        gender = VALUES(gender),
+        address = VALUES(address),
+        zone_id = VALUES(zone_id),
+        insurance_eps_id = VALUES(insurance_eps_id),
+        status = 'Activo'
+"""
+
+def upsert_chunk(cursor, patients):
+    """
+    Escribir un bloque de pacientes con un único INSERT multi-fila
+    ... ON DUPLICATE KEY UPDATE (requiere índice único en document).
+    Retorna (insertados, actualizados) calculados contra los documentos existentes.
+    """
+    documents = list({patient[0] for patient in patients})
+    placeholders = ', '.join(['%s'] * len(documents))
+    cursor.execute(f"SELECT document FROM patients_cp WHERE document IN ({placeholders})", documents)
+    # La colación de document no distingue mayúsculas: se comparan en mayúsculas,
+    # como en el modo delta y el reparto por workers
+    existing = {db_document.upper() for (db_document,) in cursor.fetchall()}
+    
+    # Un documento repetido dentro del bloque cuenta como actualización,
+    # igual que en el modo fila a fila
+    inserted = 0
+    updated = 0
+    for patient in patients:
+        key = patient[0].upper()
+        if key in existing:
+            updated += 1
+        else:
+            existing.add(key)
+            inserted += 1
+    
+    values = ', '.join([UPSERT_ROW] * len(patients))
+    params = [value for patient in patients for value in patient]
+    cursor.execute(f"INSERT INTO patients_cp {UPSERT_COLUMNS} VALUES {values} {UPSERT_ON_DUPLICATE}", params)
+    
+    return inserted, updated
+
+def flush_chunk(conn, cursor, chunk):
+    """
+    Escribir y confirmar un bloque. Si el bloque falla se reintenta fila a fila
+    para aislar los registros con error sin perder el resto.
+    Retorna (insertados, actualizados, errores).
+    """
+    try:
+        inserted, updated = upsert_chunk(cursor, [patient for _, patient in chunk])
+        conn.commit()
+        return inserted, updated, 0
+    except Error as e:
+        conn.rollback()
+        print(f"\n⚠️  Error en bloque de {len(chunk)} filas ({e}), reintentando fila a fila...")
+    
+    inserted = 0
+    updated = 0
+    errors = 0
+    for row_num, patient in chunk:
+        try:
+            row_inserted, row_updated = upsert_chunk(cursor, [patient])
             conn.commit()
+            inserted += row_inserted
+            updated += row_updated
+        except Error as e:
+            conn.rollback()
+            errors += 1
+            print(f"\n⚠️  Error en fila {row_num} (Doc: {patient[0]}): {e}")
+    
+    return inserted, updated, errors
+
+def import_patients_batched(csv_file, conn, batch_size, checkpoint=None, resume=False):
+    """
+    Importar pacientes del CSV en bloques de batch_size filas por sentencia.
+    Con checkpoint se guarda la posición tras cada bloque confirmado.
+    """
+    cursor = conn.cursor()
+    
+    try:
+        reader, (inserted, updated, errors, skipped) = start_from_checkpoint(csv_file, checkpoint, resume)
+        chunk = []
+        
+        print(f"\n🔄 Importando pacientes del CSV a patients_cp en bloques de {batch_size}...\n")
+        
+        for row_num, document, patient, error in reader:
+            if error is not None:
+                errors += 1
+                print(f"\n⚠️  Error en fila {row_num} (Doc: {document}): {error}")
+                continue
             
-            print(f"\n\n✅ PROCESO COMPLETADO:")
-            print(f"   ✅ Pacientes insertados: {inserted}")
-            print(f"   🔄 Pacientes actualizados: {updated}")
-            print(f"   ⚠️  Errores: {errors}")
-            print(f"   ⏭️  Omitidos (sin documento): {skipped}")
-            print(f"   📊 Total procesado: {inserted + updated + errors + skipped}")
+            if patient is None:
+                skipped += 1
+                continue
             
-            # Mostrar estadísticas de la tabla
-            print("\n📊 Estadísticas de patients_cp:")
-            cursor.execute("SELECT COUNT(*) FROM patients_cp")
-            total = cursor.fetchone()[0]
-            print(f"   Total de pacientes: {total}")
+            chunk.append((row_num, patient))
+            if len(chunk) >= batch_size:
+                chunk_inserted, chunk_updated, chunk_errors = flush_chunk(conn, cursor, chunk)
+                inserted += chunk_inserted
+                updated += chunk_updated
+                errors += chunk_errors
+                chunk = []
+                if checkpoint and not save_checkpoint(checkpoint, reader, inserted, updated, errors, skipped):
+                    return False
+                print(f"   Procesados: {inserted + updated + errors + skipped} | Insertados: {inserted} | Actualizados: {updated} | Errores: {errors} | Omitidos: {skipped}", end='\r')
+        
+        # Último bloque parcial
+        if chunk:
+            chunk_inserted, chunk_updated, chunk_errors = flush_chunk(conn, cursor, chunk)
+            inserted += chunk_inserted
+            updated += chunk_updated
+            errors += chunk_errors
+        if checkpoint:
+            checkpoint.clear()
+        
+        print_import_summary(cursor, inserted, updated, errors, skipped)
+        
+        return True
             
-            cursor.execute("SELECT COUNT(*) FROM patients_cp WHERE zone_id = 4")
-            zone_4 = cursor.fetchone()[0]
-            print(f"   Pacientes zona San Gil (zone_id=4): {zone_4}")
+    except Exception as e:
+        print(f"❌ Error al importar pacientes: {e}")
+        import traceback
+        traceback.print_exc()
+        conn.rollback()
+        return False
+    finally:
+        cursor.close()
+
+# Filas por bloque en el modo --delta si no se indica --batch-size
+DELTA_BATCH_SIZE = 500
+
+def patient_fingerprint(patient):
+    """Hash de los campos normalizados de un paciente (NULL distinto de cadena vacía)"""
+    data = '\x1f'.join('\x00' if value is None else str(value) for value in patient)
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=16).digest()
+
+class FingerprintStore:
+    """
+    Almacén local (SQLite) documento -> huella de la última versión escrita en
+    patients_cp. El documento se guarda en mayúsculas, como lo compara la colación.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS patient_fingerprints (
+                document TEXT PRIMARY KEY,
+                fingerprint BLOB NOT NULL
+            )
+        """)
+        self.conn.commit()
+    
+    def load(self):
+        """Todas las huellas en memoria: {documento: huella}"""
+        return dict(self.conn.execute("SELECT document, fingerprint FROM patient_fingerprints"))
+    
+    def save(self, fingerprints):
+        """Registrar las huellas [(documento, huella)] de pacientes ya confirmados en la BD"""
+        self.conn.executemany("INSERT OR REPLACE INTO patient_fingerprints (document, fingerprint) VALUES (?, ?)",
+                              fingerprints)
+        self.conn.commit()
+    
+    def close(self):
+        self.conn.close()
+
+def import_patients_delta(csv_file, conn, batch_size, store_path):
+    """
+    Importar solo los pacientes nuevos o cuyos campos cambiaron desde la última
+    importación, según las huellas del almacén local. Las huellas de un bloque
+    se registran solo si el bloque se confirmó sin errores.
+    """
+    cursor = conn.cursor()
+    store = FingerprintStore(store_path)
+    
+    try:
+        known = store.load()
+        print(f"\n🔎 Huellas registradas: {len(known)} ({store_path})")
+        
+        inserted = 0
+        updated = 0
+        errors = 0
+        skipped = 0
+        unchanged = 0
+        chunk = []
+        chunk_fingerprints = []
+        
+        print(f"\n🔄 Importando cambios del CSV a patients_cp en bloques de {batch_size}...\n")
+        
+        def flush():
+            nonlocal inserted, updated, errors
+            chunk_inserted, chunk_updated, chunk_errors = flush_chunk(conn, cursor, chunk)
+            inserted += chunk_inserted
+            updated += chunk_updated
+            errors += chunk_errors
+            if not chunk_errors:
+                store.save(chunk_fingerprints)
+                known.update(chunk_fingerprints)
+        
+        for row_num, document, patient, error in iter_patients(csv_file):
+            if error is not None:
+                errors += 1
+                print(f"\n⚠️  Error en fila {row_num} (Doc: {document}): {error}")
+                continue
             
-            cursor.execute("SELECT COUNT(*) FROM patients_cp WHERE insurance_eps_id = 12")
-            eps_12 = cursor.fetchone()[0]
-            print(f"   Pacientes con EPS 12: {eps_12}")
+            if patient is None:
+                skipped += 1
+                continue
+            
+            key = patient[0].upper()
+            fingerprint = patient_fingerprint(patient)
+            if known.get(key) == fingerprint:
+                unchanged += 1
+                continue
+            
+            chunk.append((row_num, patient))
+            chunk_fingerprints.append((key, fingerprint))
+            if len(chunk) >= batch_size:
+                flush()
+                chunk = []
+                chunk_fingerprints = []
+                print(f"   Procesados: {inserted + updated + errors + skipped + unchanged} | Insertados: {inserted} | Actualizados: {updated} | Sin cambios: {unchanged} | Errores: {errors} | Omitidos: {skipped}", end='\r')
+        
+        # Último bloque parcial
+        if chunk:
+            flush()
+        
+        print_import_summary(cursor, inserted, updated, errors, skipped, unchanged)
+        
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error al importar pacientes: {e}")
+        import traceback
+        traceback.print_exc()
+        conn.rollback()
+        return False
+    finally:
+        cursor.close()
+        store.close()
+
+# Filas por bloque en cada worker del modo --workers si no se indica --batch-size
+SHARD_BATCH_SIZE = 500
+# Bloques en cola por worker antes de frenar la lectura del CSV
+SHARD_QUEUE_CHUNKS = 4
+
+def shard_for(document, workers):
+    """
+    Worker responsable de un documento. Se usa un hash estable sobre el documento en
+    mayúsculas (la colación de patients_cp no distingue mayúsculas), así dos workers
+    nunca escriben la misma fila.
+    """
+    return zlib.crc32(document.upper().encode('utf-8')) % workers
+
+def shard_worker(shard, chunks, results):
+    """Proceso worker: conexión propia y upserts por bloques de los pacientes de su shard"""
+    inserted = 0
+    updated = 0
+    errors = 0
+    
+    conn = connect_db()
+    if not conn:
+        results.put((shard, None))
+        return
+    
+    cursor = conn.cursor()
+    try:
+        for chunk in iter(chunks.get, None):
+            chunk_inserted, chunk_updated, chunk_errors = flush_chunk(conn, cursor, chunk)
+            inserted += chunk_inserted
+            updated += chunk_updated
+            errors += chunk_errors
+        results.put((shard, (inserted, updated, errors)))
+    except Exception as e:
+        print(f"\n❌ Worker {shard}: {e}")
+        results.put((shard, None))
+    finally:
+        cursor.close()
+        conn.close()
+
+def send_chunk(process, chunks, chunk):
+    """Encolar un bloque para un worker sin bloquearse si el worker terminó"""
+    while True:
+        try:
+            chunks.put(chunk, timeout=1)
+            return
+        except queue.Full:
+            if not process.is_alive():
+                raise RuntimeError(f"El worker {process.name} terminó antes de tiempo")
+
+def collect_shard_results(processes, results):
+    """
+    Esperar el resultado de cada worker sin bloquearse para siempre. Si un worker
+    termina sin reportar (p. ej. lo mata el OOM killer o una señal), su shard se
+    da por perdido. Retorna ({shard: contadores o None}, {shard: exit code} de los perdidos).
+    """
+    reported = {}
+    lost = {}
+    while len(reported) + len(lost) < len(processes):
+        try:
+            shard, counters = results.get(timeout=1)
+            reported[shard] = counters
+            continue
+        except queue.Empty:
+            pass
+        
+        dead = [shard for shard, process in enumerate(processes)
+                if shard not in reported and shard not in lost and not process.is_alive()]
+        if not dead:
+            continue
+        # Un resultado enviado justo antes de terminar ya está en la cola
+        try:
+            while True:
+                shard, counters = results.get(timeout=0.1)
+                reported[shard] = counters
+        except queue.Empty:
+            pass
+        for shard in dead:
+            if shard not in reported:
+                lost[shard] = processes[shard].exitcode
+    
+    return reported, lost
+
+def import_patients_sharded(csv_file, conn, workers, batch_size):
+    """
+    Importar pacientes con N procesos worker, repartiendo las filas por hash del
+    documento. Cada worker usa su propia conexión y upserts por bloques; los
+    contadores se suman al final.
+    """
+    chunks = [multiprocessing.Queue(maxsize=SHARD_QUEUE_CHUNKS) for _ in range(workers)]
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=shard_worker, args=(shard, chunks[shard], results),
+                                         name=f"import-shard-{shard}")
+                 for shard in range(workers)]
+    for process in processes:
+        process.start()
+    
+    try:
+        errors = 0
+        skipped = 0
+        pending = [[] for _ in range(workers)]
+        
+        print(f"\n🔄 Importando pacientes del CSV a patients_cp con {workers} workers (bloques de {batch_size})...\n")
+        
+        for row_num, document, patient, error in iter_patients(csv_file):
+            if error is not None:
+                errors += 1
+                print(f"\n⚠️  Error en fila {row_num} (Doc: {document}): {error}")
+                continue
             
-            return True
+            if patient is None:
+                skipped += 1
+                continue
             
+            shard = shard_for(patient[0], workers)
+            pending[shard].append((row_num, patient))
+            if len(pending[shard]) >= batch_size:
+                send_chunk(processes[shard], chunks[shard], pending[shard])
+                pending[shard] = []
+        
+        # Últimos bloques parciales y fin de cada cola
+        for shard in range(workers):
+            if pending[shard]:
+                send_chunk(processes[shard], chunks[shard], pending[shard])
+            send_chunk(processes[shard], chunks[shard], None)
+        
+        inserted = 0
+        updated = 0
+        failed = []
+        reported, lost = collect_shard_results(processes, results)
+        for shard, counters in reported.items():
+            if counters is None:
+                failed.append(shard)
+                continue
+            inserted += counters[0]
+            updated += counters[1]
+            errors += counters[2]
+        
+        for process in processes:
+            process.join()
+        
+        if failed:
+            print(f"\n❌ Workers con error: {', '.join(str(shard) for shard in sorted(failed))}")
+        for shard, exitcode in sorted(lost.items()):
+            print(f"\n❌ Worker {shard} terminó sin reportar resultados (exit code {exitcode}); "
+                  f"sus filas pueden no haberse importado")
+        failed.extend(lost)
+        
+        cursor = conn.cursor()
+        try:
+            print_import_summary(cursor, inserted, updated, errors, skipped)
+        finally:
+            cursor.close()
+        
+        return not failed
+    
+    except Exception as e:
+        print(f"❌ Error al importar pacientes: {e}")
+        import traceback
+        traceback.print_exc()
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        return False
+
+# La tabla temporal copia los tipos de columna de patients_cp (CREATE ... SELECT
+# LIMIT 0) para que LOAD DATA no trunque con anchos propios. No se usa LIKE
+# porque copiaría el índice único de document, y LOAD DATA LOCAL descarta en
+# silencio (IGNORE) los documentos repetidos dentro del archivo.
+STAGING_TABLE_DDL = """
+    CREATE TEMPORARY TABLE patients_cp_staging (
+        seq INT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        KEY idx_staging_document (document)
+    )
+    SELECT document, name, phone, birth_date, gender, address, zone_id, insurance_eps_id
+    FROM patients_cp
+    LIMIT 0
+"""
+# Advertencias de LOAD DATA que se listan en detalle
+MAX_LOAD_WARNINGS_SHOWN = 10
+
+def tsv_field(value):
+    """Escapar un valor para LOAD DATA (NULL como \\N, escape con barra invertida)"""
+    if value is None:
+        return '\\N'
+    return (str(value)
+            .replace('\\', '\\\\')
+            .replace('\t', '\\t')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r'))
+
+def write_normalized_tsv(csv_file, tsv_file):
+    """
+    Normalizar el CSV hacia un TSV listo para LOAD DATA.
+    Retorna (filas escritas, errores, omitidos).
+    """
+    written = 0
+    errors = 0
+    skipped = 0
+    
+    for row_num, document, patient, error in iter_patients(csv_file):
+        if error is not None:
+            errors += 1
+            print(f"\n⚠️  Error en fila {row_num} (Doc: {document}): {error}")
+            continue
+        
+        if patient is None:
+            skipped += 1
+            continue
+        
+        tsv_file.write('\t'.join(tsv_field(value) for value in patient) + '\n')
+        written += 1
+    
+    return written, errors, skipped
+
+def report_load_warnings(cursor):
+    """
+    Revisar las advertencias de la última sentencia (LOAD DATA): valores
+    truncados o convertidos que MySQL acepta sin error. Retorna cuántas hubo.
+    """
+    cursor.execute("SHOW COUNT(*) WARNINGS")
+    warning_count = cursor.fetchone()[0]
+    if not warning_count:
+        return 0
+    
+    cursor.execute(f"SHOW WARNINGS LIMIT {MAX_LOAD_WARNINGS_SHOWN}")
+    print(f"\n⚠️  LOAD DATA generó {warning_count} advertencias (valores truncados o convertidos; "
+          f"'row' es la línea del archivo normalizado):")
+    for level, code, message in cursor.fetchall():
+        print(f"   • [{level} {code}] {message}")
+    if warning_count > MAX_LOAD_WARNINGS_SHOWN:
+        print(f"   ... y {warning_count - MAX_LOAD_WARNINGS_SHOWN} más")
+    return warning_count
+
+def import_patients_bulk(csv_file, conn):
+    """
+    Importar pacientes con LOAD DATA LOCAL INFILE a una tabla temporal y
+    fusionar en patients_cp con un único INSERT ... SELECT ... ON DUPLICATE KEY UPDATE
+    """
+    cursor = conn.cursor()
+    tsv_path = None
+    
+    try:
+        print("\n🔄 Normalizando CSV a archivo temporal...")
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.tsv', delete=False, newline='') as tsv_file:
+            tsv_path = tsv_file.name
+            written, errors, skipped = write_normalized_tsv(csv_file, tsv_file)
+        print(f"   Filas normalizadas: {written} | Errores: {errors} | Omitidos: {skipped}")
+        
+        print("🔄 Cargando archivo en tabla temporal patients_cp_staging...")
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS patients_cp_staging")
+        cursor.execute(STAGING_TABLE_DDL)
+        cursor.execute("""
+            LOAD DATA LOCAL INFILE %s
+            INTO TABLE patients_cp_staging
+            CHARACTER SET utf8mb4
+            FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'
+            LINES TERMINATED BY '\\n'
+            (document, name, phone, birth_date, gender, address, zone_id, insurance_eps_id)
+        """, (tsv_path,))
+        load_warnings = report_load_warnings(cursor)
+        
+        # Contadores calculados sobre la tabla temporal antes de fusionar:
+        # cada documento nuevo cuenta una inserción, el resto de filas son actualizaciones
+        cursor.execute("SELECT COUNT(*) FROM patients_cp_staging")
+        staged = cursor.fetchone()[0]
+        cursor.execute("""
+            SELECT COUNT(DISTINCT s.document)
+            FROM patients_cp_staging s
+            LEFT JOIN patients_cp p ON p.document = s.document
+            WHERE p.id IS NULL
+        """)
+        inserted = cursor.fetchone()[0]
+        updated = staged - inserted
+        errors += written - staged
+        
+        print("🔄 Fusionando tabla temporal en patients_cp...")
+        cursor.execute(f"""
+            INSERT INTO patients_cp {UPSERT_COLUMNS}
+            SELECT document, name, phone, birth_date, gender, address, zone_id, insurance_eps_id, 'Activo'
+            FROM patients_cp_staging
+            ORDER BY seq
+            {UPSERT_ON_DUPLICATE}
+        """)
+        conn.commit()
+        
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS patients_cp_staging")
+        
+        print_import_summary(cursor, inserted, updated, errors, skipped)
+        if load_warnings:
+            print(f"   ⚠️  Advertencias de LOAD DATA: {load_warnings} (revisar valores truncados)")
+        
+        return True
+        
     except Exception as e:
         print(f"❌ Error al importar pacientes: {e}")
+        print("   ℹ️  El modo --bulk-load requiere local_infile=ON en el servidor MySQL")
         import traceback
         traceback.print_exc()
         conn.rollback()
         return False
     finally:
         cursor.close()
+        if tsv_path and os.path.exists(tsv_path):
+            os.remove(tsv_path)
+
+def parse_args():
+    """Leer argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Importar pacientes de un CSV a la tabla patients_cp")
+    parser.add_argument('csv_file', nargs='?', default="/home/ubuntu/app/san_gil.csv",
+                        help="Archivo CSV de entrada (por defecto: /home/ubuntu/app/san_gil.csv)")
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help="Importar en bloques de N filas con INSERT ... ON DUPLICATE KEY UPDATE multi-fila")
+    parser.add_argument('--bulk-load', action='store_true',
+                        help="Cargar con LOAD DATA LOCAL INFILE a una tabla temporal y fusionar en una sola sentencia")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Importar con N procesos en paralelo, repartiendo las filas por hash del documento")
+    parser.add_argument('--delta', action='store_true',
+                        help="Enviar solo pacientes nuevos o con cambios, según un almacén local de huellas")
+    parser.add_argument('--fingerprint-store', default=None,
+                        help="Almacén SQLite de huellas para --delta (por defecto: patients_cp_fingerprints.sqlite junto al CSV)")
+    parser.add_argument('--checkpoint', default=None,
+                        help="Archivo de checkpoint (por defecto: <csv_file>.checkpoint.json)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continuar desde la última fila confirmada según el checkpoint")
+    args = parser.parse_args()
+    if args.batch_size is not None and args.batch_size < 1:
+        parser.error("--batch-size debe ser mayor que 0")
+    if args.bulk_load and args.batch_size:
+        parser.error("--bulk-load y --batch-size son excluyentes")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers debe ser mayor que 0")
+    if args.workers and args.bulk_load:
+        parser.error("--workers y --bulk-load son excluyentes")
+    if args.delta and (args.bulk_load or args.workers or args.resume):
+        parser.error("--delta no está disponible con --bulk-load, --workers ni --resume")
+    if args.resume and (args.bulk_load or args.workers):
+        parser.error("--resume no está disponible con --bulk-load ni --workers")
+    if args.checkpoint is None:
+        args.checkpoint = args.csv_file + '.checkpoint.json'
+    if args.fingerprint_store is None:
+        args.fingerprint_store = os.path.join(os.path.dirname(os.path.abspath(args.csv_file)),
+                                              'patients_cp_fingerprints.sqlite')
+    return args
 
 def main():
-    csv_file = "/home/ubuntu/app/san_gil.csv"
+    args = parse_args()
+    csv_file = args.csv_file
     
     print("🔄 Importando pacientes del CSV a la base de datos...")
     print(f"📂 Archivo CSV: {csv_file}")
     print(f"🗄️  Tabla destino: patients_cp")
     print(f"📋 Zona: 4 (San Gil)")
-    print(f"🏥 EPS: 12\n")
+    print(f"🏥 EPS: 12")
+    if args.batch_size:
+        print(f"📦 Modo por bloques: {args.batch_size} filas por sentencia")
+    if args.bulk_load:
+        print(f"📦 Modo carga masiva: LOAD DATA LOCAL INFILE")
+    if args.delta:
+        print(f"📦 Modo delta: huellas en {args.fingerprint_store}")
+    if args.workers:
+        print(f"📦 Modo paralelo: {args.workers} workers con conexión propia")
+    if args.resume:
+        print(f"⏩ Reanudar desde checkpoint: {args.checkpoint}")
+    print()
     
     # Conectar a la base de datos
-    conn = connect_db()
+    if args.bulk_load:
+        conn = connect_db(allow_local_infile=True)
+    else:
+        conn = connect_db()
     if not conn:
         sys.exit(1)
     
+    # Checkpoint tras cada commit en los modos fila a fila (el resto no avanza por filas)
+    checkpoint = None
+    if not (args.bulk_load or args.workers or args.delta):
+        try:
+            checkpoint = ImportCheckpoint(args.checkpoint, csv_file)
+            if args.resume:
+                checkpoint.load()
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}")
+            conn.close()
+            sys.exit(1)
+    
     # Importar pacientes
-    success = import_patients(csv_file, conn)
+    if args.bulk_load:
+        success = import_patients_bulk(csv_file, conn)
+    elif args.delta:
+        success = import_patients_delta(csv_file, conn, args.batch_size or DELTA_BATCH_SIZE,
+                                        args.fingerprint_store)
+    elif args.workers:
+        success = import_patients_sharded(csv_file, conn, args.workers,
+                                          args.batch_size or SHARD_BATCH_SIZE)
+    elif args.batch_size:
+        success = import_patients_batched(csv_file, conn, args.batch_size, checkpoint, args.resume)
+    else:
+        success = import_patients(csv_file, conn, checkpoint, args.resume)
     
     # Cerrar conexión
     conn.close()
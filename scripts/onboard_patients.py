@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Script para incorporar los pacientes de una región en un solo paso
+
+Reemplaza la cadena reorganize_names_with_zone.py → create_san_gil_with_eps.py →
+add_insurance_eps_id.py → import_csv_to_patients.py → update_zone_relationships.py.
+Las etapas se encadenan como generadores en memoria: el CSV de origen se lee una
+sola vez, sin archivos intermedios, y las filas llegan a patients_cp por bloques.
+"""
+
+import argparse
+import csv
+import sys
+from collections import Counter
+
+from db import DB_CONFIG, connect_db, execute_batches
+from import_csv_to_patients import extract_patient, flush_chunk, print_import_summary
+from reorganize_names_with_zone import ZONE_CLASSIFIER, build_output_row
+from update_database_with_zones import (ZONE_STAGING_INSERT, add_zone_column, apply_zone_staging,
+                                        create_zone_staging)
+from update_zone_relationships import ZONE_MAPPING, update_zone_relationships
+
+# Filas por INSERT ... ON DUPLICATE KEY UPDATE multi-fila
+ONBOARD_BATCH_SIZE = 500
+
+def reorganized_rows(input_file, encoding, zone_stats):
+    """Etapa 1: leer el CSV de origen, reorganizar el nombre y clasificar la zona"""
+    with open(input_file, 'r', encoding=encoding) as infile:
+        reader = csv.DictReader(infile)
+        for row_num, row in enumerate(reader, start=2):
+            new_row = build_output_row(row)
+            zone_stats[new_row['zona']] += 1
+            yield row_num, new_row
+
+def filter_zones(rows, zones):
+    """Etapa 2: conservar solo las filas de las zonas indicadas"""
+    for row_num, row in rows:
+        if row['zona'] in zones:
+            yield row_num, row
+
+def assign_eps(rows, eps_id):
+    """Etapa 3: asignar la EPS a cada fila (vacía si eps_id es None)"""
+    value = str(eps_id) if eps_id is not None else ''
+    for row_num, row in rows:
+        row['insurance_eps_id'] = value
+        yield row_num, row
+
+def normalize_patients(rows, counters):
+    """
+    Etapa 4: convertir cada fila a la tupla de patients_cp con extract_patient().
+    La zona (texto) se traduce a zone_id con ZONE_MAPPING. Genera (fila, paciente, zona).
+    """
+    for row_num, row in rows:
+        zona = row['zona']
+        zone_id = ZONE_MAPPING.get(zona)
+        row['zona'] = str(zone_id) if zone_id is not None else ''
+
+        try:
+            patient = extract_patient(row)
+        except Exception as e:
+            counters['errors'] += 1
+            print(f"\n⚠️  Error en fila {row_num} (Doc: {row.get('document', '')}): {e}")
+            continue
+
+        if patient is None:
+            counters['skipped'] += 1
+            continue
+
+        yield row_num, patient, zona
+
+def write_patients(conn, patients, batch_size, counters, zone_pairs):
+    """
+    Etapa 5: upserts por bloques en patients_cp. Los pares (documento, zona)
+    se acumulan en zone_pairs para actualizar la columna zona al final.
+    """
+    cursor = conn.cursor()
+    chunk = []
+
+    def flush():
+        inserted, updated, errors = flush_chunk(conn, cursor, chunk)
+        counters['inserted'] += inserted
+        counters['updated'] += updated
+        counters['errors'] += errors
+        print(f"   Procesados: {sum(counters.values())} | Insertados: {counters['inserted']} | "
+              f"Actualizados: {counters['updated']} | Errores: {counters['errors']} | "
+              f"Omitidos: {counters['skipped']}", end='\r')
+
+    try:
+        for row_num, patient, zona in patients:
+            chunk.append((row_num, patient))
+            zone_pairs.append((patient[0], zona))
+            if len(chunk) >= batch_size:
+                flush()
+                chunk = []
+
+        if chunk:
+            flush()
+    finally:
+        cursor.close()
+
+def update_zone_text(conn, zone_pairs):
+    """Etapa 6: escribir la zona (texto) de los pacientes incorporados con un UPDATE ... JOIN"""
+    print("\n\n🔄 Actualizando la columna zona de los pacientes incorporados...")
+    cursor = conn.cursor()
+    try:
+        if not add_zone_column(cursor):
+            return False
+        create_zone_staging(cursor)
+        execute_batches(cursor, ZONE_STAGING_INSERT, zone_pairs)
+        updated_count, not_found_count = apply_zone_staging(cursor)
+        conn.commit()
+        print(f"\n📍 Zona actualizada en {updated_count} pacientes ({not_found_count} no encontrados)")
+        return True
+    finally:
+        cursor.close()
+
+def onboard_patients(input_file, conn, zones, eps_id, batch_size=ONBOARD_BATCH_SIZE,
+                     encoding='iso-8859-1', dry_run=False):
+    """Ejecutar la cadena completa. Con dry_run se recorren las etapas sin escribir en la BD."""
+    zone_stats = Counter()
+    counters = Counter(inserted=0, updated=0, errors=0, skipped=0)
+    zone_pairs = []
+
+    rows = reorganized_rows(input_file, encoding, zone_stats)
+    rows = filter_zones(rows, zones)
+    rows = assign_eps(rows, eps_id)
+    patients = normalize_patients(rows, counters)
+
+    try:
+        if dry_run:
+            for _, patient, zona in patients:
+                zone_pairs.append((patient[0], zona))
+        else:
+            print(f"\n🔄 Incorporando pacientes a patients_cp en bloques de {batch_size}...\n")
+            write_patients(conn, patients, batch_size, counters, zone_pairs)
+            if zone_pairs and not update_zone_text(conn, zone_pairs):
+                return False
+    except Exception as e:
+        print(f"\n❌ Error al incorporar pacientes: {e}")
+        import traceback
+        traceback.print_exc()
+        if conn:
+            conn.rollback()
+        return False
+
+    print(f"\n\n📊 Filas leídas del origen: {sum(zone_stats.values())}")
+    for zona, count in zone_stats.most_common():
+        marker = "→" if zona in zones else " "
+        print(f"  {marker} {zona}: {count}")
+
+    if dry_run:
+        print(f"\n🧪 Simulación: {len(zone_pairs)} pacientes se escribirían en patients_cp "
+              f"({counters['errors']} errores, {counters['skipped']} sin documento)")
+        return True
+
+    cursor = conn.cursor()
+    try:
+        print_import_summary(cursor, counters['inserted'], counters['updated'],
+                             counters['errors'], counters['skipped'])
+    finally:
+        cursor.close()
+
+    # Etapa 7: relaciones zone_id a partir de la columna zona
+    return update_zone_relationships(conn)
+
+def parse_args():
+    """Leer argumentos de línea de comandos"""
+    zone_labels = sorted(set(ZONE_CLASSIFIER.labels.values()) | {ZONE_CLASSIFIER.default})
+    parser = argparse.ArgumentParser(description="Incorporar pacientes de una región a patients_cp en un solo paso")
+    parser.add_argument('input_file', nargs='?', default="/home/ubuntu/app/DATABASE.csv",
+                        help="CSV de origen (por defecto: /home/ubuntu/app/DATABASE.csv)")
+    parser.add_argument('--zones', nargs='+', default=['SAN GIL'], metavar='ZONA',
+                        help="Zonas a incorporar, según reorganize_names_with_zone.py (por defecto: SAN GIL)")
+    parser.add_argument('--eps-id', type=int, default=12,
+                        help="insurance_eps_id asignado a los pacientes (por defecto: 12)")
+    parser.add_argument('--no-eps', action='store_true',
+                        help="No asignar EPS (insurance_eps_id NULL)")
+    parser.add_argument('--batch-size', type=int, default=ONBOARD_BATCH_SIZE,
+                        help=f"Filas por INSERT multi-fila (por defecto: {ONBOARD_BATCH_SIZE})")
+    parser.add_argument('--encoding', default='iso-8859-1',
+                        help="Codificación del CSV de origen (por defecto: iso-8859-1)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Recorrer todas las etapas sin escribir en la base de datos")
+    args = parser.parse_args()
+    unknown = [zone for zone in args.zones if zone not in zone_labels]
+    if unknown:
+        parser.error(f"Zonas desconocidas: {', '.join(unknown)}. Disponibles: {', '.join(zone_labels)}")
+    if args.batch_size < 1:
+        parser.error("--batch-size debe ser mayor que 0")
+    if args.no_eps:
+        args.eps_id = None
+    return args
+
+def main():
+    args = parse_args()
+    zones = set(args.zones)
+
+    print("🔄 Incorporando pacientes en un solo paso...")
+    print(f"📂 Archivo origen: {args.input_file}")
+    print(f"🗄️  Base de datos: {DB_CONFIG['database']} (tabla patients_cp)")
+    print(f"📋 Zonas: {', '.join(sorted(zones))}")
+    print(f"🏥 EPS: {args.eps_id if args.eps_id is not None else 'sin asignar'}")
+    if args.dry_run:
+        print("🧪 Modo simulación: no se escribe en la base de datos")
+    print()
+
+    conn = None
+    if not args.dry_run:
+        conn = connect_db()
+        if not conn:
+            sys.exit(1)
+
+    success = onboard_patients(args.input_file, conn, zones, args.eps_id,
+                               args.batch_size, args.encoding, args.dry_run)
+
+    if conn:
+        conn.close()
+        print("\n🔒 Conexión cerrada")
+
+    sys.exit(0 if success else 1)
+
+if __name__ == "__main__":
+    main()
@@ -8,58 +8,65 @@ A: NOMBRES PRIMER_APELLIDO SEGUNDO_APELLIDO (una sola columna)
 import csv
 import sys
 
+# Columnas del CSV reorganizado
+OUTPUT_FIELDNAMES = ['id', 'external_id', 'document', 'full_name', 'TIPO SEXO',
+                     'DIRECCION RESIDENCIA', 'TELEFONO RESIDENCIA', 'FECHA NACIMIENTO']
+
+def build_output_row(row):
+    """Reorganizar el nombre de una fila del CSV original"""
+    # Obtener los componentes del nombre
+    nombres = row.get('NOMBRES', '').strip()
+    primer_apellido = row.get('PRIMER APELLIDO', '').strip()
+    segundo_apellido = row.get('SEGUNDO APELLIDO', '').strip()
+    
+    # Combinar en formato: NOMBRES PRIMER_APELLIDO SEGUNDO_APELLIDO
+    full_name_parts = []
+    if nombres:
+        full_name_parts.append(nombres)
+    if primer_apellido:
+        full_name_parts.append(primer_apellido)
+    if segundo_apellido:
+        full_name_parts.append(segundo_apellido)
+    
+    full_name = ' '.join(full_name_parts)
+    
+    # Crear nueva fila
+    return {
+        'id': row.get('id', ''),
+        'external_id': row.get('external_id', ''),
+        'document': row.get('document', ''),
+        'full_name': full_name,
+        'TIPO SEXO': row.get('TIPO SEXO', ''),
+        'DIRECCION RESIDENCIA': row.get('DIRECCION RESIDENCIA', ''),
+        'TELEFONO RESIDENCIA': row.get('TELEFONO RESIDENCIA', ''),
+        'FECHA NACIMIENTO': row.get('FECHA NACIMIENTO', '')
+    }
+
+def transform_rows(reader, examples):
+    """Generador que transforma las filas una a una guardando los primeros 5 ejemplos"""
+    for row in reader:
+        new_row = build_output_row(row)
+        if len(examples) < 5:
+            examples.append(new_row)
+        yield new_row
+
 def reorganize_names(input_file, output_file):
     """
-    Lee el CSV original y reorganiza los nombres en una sola columna
+    Lee el CSV original y reorganiza los nombres en una sola columna.
+    Las filas se leen, transforman y escriben una a una (memoria constante).
     """
     try:
-        with open(input_file, 'r', encoding='iso-8859-1') as infile:
-            reader = csv.DictReader(infile)
-            
-            # Preparar nuevas columnas
-            fieldnames = ['id', 'external_id', 'document', 'full_name', 'TIPO SEXO', 
-                         'DIRECCION RESIDENCIA', 'TELEFONO RESIDENCIA', 'FECHA NACIMIENTO']
-            
-            rows_processed = 0
-            rows_output = []
-            
-            for row in reader:
-                # Obtener los componentes del nombre
-                nombres = row.get('NOMBRES', '').strip()
-                primer_apellido = row.get('PRIMER APELLIDO', '').strip()
-                segundo_apellido = row.get('SEGUNDO APELLIDO', '').strip()
-                
-                # Combinar en formato: NOMBRES PRIMER_APELLIDO SEGUNDO_APELLIDO
-                full_name_parts = []
-                if nombres:
-                    full_name_parts.append(nombres)
-                if primer_apellido:
-                    full_name_parts.append(primer_apellido)
-                if segundo_apellido:
-                    full_name_parts.append(segundo_apellido)
-                
-                full_name = ' '.join(full_name_parts)
-                
-                # Crear nueva fila
-                new_row = {
-                    'id': row.get('id', ''),
-                    'external_id': row.get('external_id', ''),
-                    'document': row.get('document', ''),
-                    'full_name': full_name,
-                    'TIPO SEXO': row.get('TIPO SEXO', ''),
-                    'DIRECCION RESIDENCIA': row.get('DIRECCION RESIDENCIA', ''),
-                    'TELEFONO RESIDENCIA': row.get('TELEFONO RESIDENCIA', ''),
-                    'FECHA NACIMIENTO': row.get('FECHA NACIMIENTO', '')
-                }
-                
-                rows_output.append(new_row)
-                rows_processed += 1
+        examples = []
+        rows_processed = 0
         
-        # Escribir el nuevo CSV
-        with open(output_file, 'w', encoding='utf-8', newline='') as outfile:
-            writer = csv.DictWriter(outfile, fieldnames=fieldnames)
+        with open(input_file, 'r', encoding='iso-8859-1') as infile, \
+                open(output_file, 'w', encoding='utf-8', newline='') as outfile:
+            reader = csv.DictReader(infile)
+            writer = csv.DictWriter(outfile, fieldnames=OUTPUT_FIELDNAMES)
             writer.writeheader()
-            writer.writerows(rows_output)
+            for new_row in transform_rows(reader, examples):
+                writer.writerow(new_row)
+                rows_processed += 1
         
         print(f"✅ Proceso completado exitosamente")
         print(f"📊 Filas procesadas: {rows_processed}")
@@ -67,7 +74,7 @@ def reorganize_names(input_file, output_file):
         
         # Mostrar algunos ejemplos
         print("\n📋 Ejemplos de nombres reorganizados:")
-        for i, row in enumerate(rows_output[:5], 1):
+        for i, row in enumerate(examples, 1):
             print(f"  {i}. {row['full_name']}")
         
         return True
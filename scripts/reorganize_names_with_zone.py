@@ -5,290 +5,490 @@ De: PRIMER APELLIDO, SEGUNDO APELLIDO, NOMBRES (columnas separadas)
 A: NOMBRES PRIMER_APELLIDO SEGUNDO_APELLIDO (una sola columna) + ZONA
 """
 
+import argparse
 import csv
+import functools
+import io
+import itertools
+import os
 import re
 import sys
+from collections import deque
+from multiprocessing import Pool
+
+# Municipios de la Provincia de San Gil (Santander)
+# Estos municipios pertenecen a San Gil, por lo que se clasificarán como SAN GIL
+SAN_GIL_MUNICIPALITIES = {
+    'SAN GIL': [
+        r'\bSAN\s*GIL\b',
+        r'\bSGIL\b',
+        r'\bS\.GIL\b',
+        r'\bSANGIL\b',
+        r'\bSAN\s*G',
+        r'\bS\s*GIL\b',
+        # Variaciones mal escritas o cortadas
+        r'SAN\s*SANAS',
+        r'SAN\s*SANTAS',
+        r'SAN\s*SAN\b',
+        r'SANTNADER',
+        r'SATNADER',
+        r'SATANDER',
+        r'SANANDER',
+        r'SANANDERS',
+        r'SANTANDERS',
+        r'SANTANDR',
+        r'SANTASS',
+        r'SANTSAS',
+        r'\bSNAT\b',
+        r'\bSANT\b$',
+        r'\bSANAS\b',
+        r'\bSANTAS\b',
+        r'\bSASAS\b',
+        r'\bSASASS\b',
+        r'\bSAAS\b',
+        r'\bSSSS\b',
+        r'\bSSS\b',
+        r'\bSS\b$',
+        r'\bSANA\b$',
+        r'\bSNT\b',
+        r'SANNN',
+        r'SANSS',
+        r'SASA$',
+        # Barrios conocidos de San Gil
+        r'LA\s*GRUTA',
+        r'RAGONESS',
+        r'FATIMA',
+        r'MARIA\s*AUXILIADORA',
+        r'ALTAMIRA',
+        r'ALAMEDA\s*REAL',
+        r'VILLA\s*OLIMPICA',
+        r'PROVIVIENDA',
+        r'BELLA\s*ISLA',
+        r'CIUDADELA\s*DEL\s*FONCE',
+        r'VISTA\s*CAMPESTRE',
+        r'ALTOS\s*DE\s*SAN\s*JORGE',
+        r'TORRES\s*DEL\s*CASTILLO',
+        r'PASEO\s*DEL\s*MANGO',
+        r'SAN\s*JUAN\s*DE\s*DIOS',
+        r'SIMON\s*BOLIVAR',
+        r'DIVINO\s*NI.O',
+        r'PEDRO\s*FERMIN',
+        r'PORTAL\s*DE\s*LA\s*CRUZ',
+        r'SAN\s*CARLOS',
+        r'SAN\s*ROQUE'
+    ],
+    'ARATOCA': [
+        r'\bARATOCA\b',
+        r'\bARATOKA\b'
+    ],
+    'BARICHARA': [
+        r'\bBARICHARA\b',
+        r'\bBARICHARARA\b'
+    ],
+    'CHARALÁ': [
+        r'\bCHARALA\b',
+        r'\bCHARALÁ\b'
+    ],
+    'CURITÍ': [
+        r'\bCURITI\b',
+        r'\bCURITÍ\b',
+        r'\bKURITI\b'
+    ],
+    'MOGOTES': [
+        r'\bMOGOTES\b'
+    ],
+    'OCAMONTE': [
+        r'\bOCAMONTE\b',
+        r'\bOKAMONTE\b'
+    ],
+    'PINCHOTE': [
+        r'\bPINCHOTE\b'
+    ],
+    'VALLE DE SAN JOSÉ': [
+        r'\bVALLE\s*DE\s*SAN\s*JOSE\b',
+        r'\bVALLE\s*DE\s*SAN\s*JOSÉ\b'
+    ],
+    'ONZAGA': [
+        r'\bONZAGA\b',
+        r'\bONSAGA\b'
+    ],
+    'ENCINO': [
+        r'\bENCINO\b'
+    ],
+    'PÁRAMO': [
+        r'\bPARAMO\b',
+        r'\bPÁRAMO\b'
+    ]
+}
+
+# Municipios de la Provincia de Socorro (Santander)
+SOCORRO_MUNICIPALITIES = {
+    'SOCORRO': [
+        r'\bSOCORRO\b',
+        r'\bSCORRO\b',
+        r'\bSOCORO\b'
+    ],
+    'CONFINES': [
+        r'\bCONFINES\b'
+    ],
+    'CONTRATACIÓN': [
+        r'\bCONTRATACION\b',
+        r'\bCONTRATACIÓN\b'
+    ],
+    'CHIMA': [
+        r'\bCHIMA\b'
+    ],
+    'GALÁN': [
+        r'\bGALAN\b',
+        r'\bGALÁN\b'
+    ],
+    'GAMBITA': [
+        r'\bGAMBITA\b'
+    ],
+    'GUAPOTÁ': [
+        r'\bGUAPOTA\b',
+        r'\bGUAPOTÁ\b'
+    ],
+    'JORDÁN': [
+        r'\bJORDAN\b',
+        r'\bJORDÁN\b'
+    ],
+    'OIBA': [
+        r'\bOIBA\b',
+        r'\bOYBA\b'
+    ],
+    'PALMAR': [
+        r'\bPALMAR\b'
+    ],
+    'SAN JOAQUÍN': [
+        r'\bSAN\s*JOAQUIN\b',
+        r'\bSAN\s*JOAQUÍN\b'
+    ],
+    'SIMACOTA': [
+        r'\bSIMACOTA\b'
+    ]
+}
+
+# Otras zonas importantes
+OTHER_ZONES = {
+    'VILLANUEVA': [
+        r'\bVILLANUEVA\b',
+        r'\bVILLA\s*NUEVA\b'
+    ],
+    'GUANE': [
+        r'\bGUANE\b'
+    ]
+}
+
+# Grupos en orden de prioridad: (etiqueta del grupo o None si cada zona
+# conserva su propio nombre, tabla de patrones)
+ZONE_GROUPS = [
+    ("SAN GIL", SAN_GIL_MUNICIPALITIES),
+    ("SOCORRO", SOCORRO_MUNICIPALITIES),
+    (None, OTHER_ZONES),
+    ("SANTANDER (OTRA)", {'SANTANDER': [r'\bSANTANDER\b']}),
+]
+
+class ZoneClassifier:
+    """
+    Clasificador de zonas compilado una sola vez.
+    Todos los patrones se combinan en una única expresión con un grupo con
+    nombre por municipio, envuelta en un lookahead para que cada posición de
+    la dirección reporte el municipio de mayor prioridad que coincide ahí.
+    Así se recorre la dirección una sola vez y se respeta el mismo orden de
+    prioridad que la búsqueda patrón por patrón.
+    """
+
+    def __init__(self, zone_groups, default="NO ESPECIFICADA"):
+        self.default = default
+        self.labels = {}      # nombre de grupo -> etiqueta de zona
+        self.priorities = {}  # nombre de grupo -> prioridad (menor gana)
+        alternatives = []
+        
+        priority = 0
+        for group_label, municipalities in zone_groups:
+            for municipality, patterns in municipalities.items():
+                group_name = f"z{len(alternatives)}"
+                self.labels[group_name] = group_label or municipality
+                self.priorities[group_name] = priority
+                alternatives.append(f"(?P<{group_name}>{'|'.join(patterns)})")
+                # Dentro de un grupo con etiqueta común el municipio no importa
+                if group_label is None:
+                    priority += 1
+            if group_label is not None:
+                priority += 1
+        
+        self.pattern = re.compile(f"(?=(?:{'|'.join(alternatives)}))")
+
+    def classify(self, address):
+        """Retorna la zona de la dirección o el valor por defecto"""
+        if not address:
+            return self.default
+        
+        best_group = None
+        best_priority = None
+        for match in self.pattern.finditer(address.upper()):
+            group_name = match.lastgroup
+            priority = self.priorities[group_name]
+            if best_priority is None or priority < best_priority:
+                best_group = group_name
+                best_priority = priority
+                # Nada supera a la primera prioridad
+                if priority == 0:
+                    break
+        
+        if best_group is None:
+            return self.default
+        return self.labels[best_group]
+
+ZONE_CLASSIFIER = ZoneClassifier(ZONE_GROUPS)
+
+# Máximo de direcciones distintas recordadas por el caché de zonas
+ZONE_CACHE_SIZE = 65536
+
+def normalize_address(address):
+    """
+    Llave del caché: la dirección en mayúsculas, sin recortar ni colapsar
+    espacios (los patrones anclados con $ dependen del final exacto)
+    """
+    return address.upper()
+
+@functools.lru_cache(maxsize=ZONE_CACHE_SIZE)
+def classify_normalized_address(address_key):
+    """Clasificar una dirección ya normalizada (con caché LRU)"""
+    return ZONE_CLASSIFIER.classify(address_key)
 
 def identify_zone(address):
     """
     Identifica la zona geográfica basándose en la dirección
     """
     if not address:
-        return "NO ESPECIFICADA"
+        return ZONE_CLASSIFIER.default
+    return classify_normalized_address(normalize_address(address))
+
+# Columnas del CSV reorganizado
+OUTPUT_FIELDNAMES = ['id', 'external_id', 'document', 'full_name', 'TIPO SEXO',
+                     'DIRECCION RESIDENCIA', 'zona', 'TELEFONO RESIDENCIA', 'FECHA NACIMIENTO']
+
+# Bloques por proceso en modo paralelo (más bloques = mejor balance de carga)
+CHUNKS_PER_WORKER = 4
+# Tamaño objetivo de cada bloque: en archivos grandes hay más bloques, no bloques
+# más grandes, para que la memoria de cada bloque no crezca con el archivo
+CHUNK_TARGET_BYTES = 16 * 1024 * 1024
+# Bloques en proceso o esperando ser escritos, por proceso del pool
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+def build_output_row(row):
+    """Reorganizar el nombre y clasificar la zona de una fila del CSV original"""
+    # Obtener los componentes del nombre
+    nombres = row.get('NOMBRES', '').strip()
+    primer_apellido = row.get('PRIMER APELLIDO', '').strip()
+    segundo_apellido = row.get('SEGUNDO APELLIDO', '').strip()
     
-    # Convertir a mayúsculas para búsqueda insensible a mayúsculas
-    addr_upper = address.upper()
+    # Combinar en formato: NOMBRES PRIMER_APELLIDO SEGUNDO_APELLIDO
+    full_name_parts = []
+    if nombres:
+        full_name_parts.append(nombres)
+    if primer_apellido:
+        full_name_parts.append(primer_apellido)
+    if segundo_apellido:
+        full_name_parts.append(segundo_apellido)
     
-    # Municipios de la Provincia de San Gil (Santander)
-    # Estos municipios pertenecen a San Gil, por lo que se clasificarán como SAN GIL
-    san_gil_municipalities = {
-        'SAN GIL': [
-            r'\bSAN\s*GIL\b',
-            r'\bSGIL\b',
-            r'\bS\.GIL\b',
-            r'\bSANGIL\b',
-            r'\bSAN\s*G',
-            r'\bS\s*GIL\b',
-            # Variaciones mal escritas o cortadas
-            r'SAN\s*SANAS',
-            r'SAN\s*SANTAS',
-            r'SAN\s*SAN\b',
-            r'SANTNADER',
-            r'SATNADER',
-            r'SATANDER',
-            r'SANANDER',
-            r'SANANDERS',
-            r'SANTANDERS',
-            r'SANTANDR',
-            r'SANTASS',
-            r'SANTSAS',
-            r'\bSNAT\b',
-            r'\bSANT\b$',
-            r'\bSANAS\b',
-            r'\bSANTAS\b',
-            r'\bSASAS\b',
-            r'\bSASASS\b',
-            r'\bSAAS\b',
-            r'\bSSSS\b',
-            r'\bSSS\b',
-            r'\bSS\b$',
-            r'\bSANA\b$',
-            r'\bSNT\b',
-            r'SANNN',
-            r'SANSS',
-            r'SASA$',
-            # Barrios conocidos de San Gil
-            r'LA\s*GRUTA',
-            r'RAGONESS',
-            r'FATIMA',
-            r'MARIA\s*AUXILIADORA',
-            r'ALTAMIRA',
-            r'ALAMEDA\s*REAL',
-            r'VILLA\s*OLIMPICA',
-            r'PROVIVIENDA',
-            r'BELLA\s*ISLA',
-            r'CIUDADELA\s*DEL\s*FONCE',
-            r'VISTA\s*CAMPESTRE',
-            r'ALTOS\s*DE\s*SAN\s*JORGE',
-            r'TORRES\s*DEL\s*CASTILLO',
-            r'PASEO\s*DEL\s*MANGO',
-            r'SAN\s*JUAN\s*DE\s*DIOS',
-            r'SIMON\s*BOLIVAR',
-            r'DIVINO\s*NI.O',
-            r'PEDRO\s*FERMIN',
-            r'PORTAL\s*DE\s*LA\s*CRUZ',
-            r'SAN\s*CARLOS',
-            r'SAN\s*ROQUE'
-        ],
-        'ARATOCA': [
-            r'\bARATOCA\b',
-            r'\bARATOKA\b'
-        ],
-        'BARICHARA': [
-            r'\bBARICHARA\b',
-            r'\bBARICHARARA\b'
-        ],
-        'CHARALÁ': [
-            r'\bCHARALA\b',
-            r'\bCHARALÁ\b'
-        ],
-        'CURITÍ': [
-            r'\bCURITI\b',
-            r'\bCURITÍ\b',
-            r'\bKURITI\b'
-        ],
-        'MOGOTES': [
-            r'\bMOGOTES\b'
-        ],
-        'OCAMONTE': [
-            r'\bOCAMONTE\b',
-            r'\bOKAMONTE\b'
-        ],
-        'PINCHOTE': [
-            r'\bPINCHOTE\b'
-        ],
-        'VALLE DE SAN JOSÉ': [
-            r'\bVALLE\s*DE\s*SAN\s*JOSE\b',
-            r'\bVALLE\s*DE\s*SAN\s*JOSÉ\b'
-        ],
-        'ONZAGA': [
-            r'\bONZAGA\b',
-            r'\bONSAGA\b'
-        ],
-        'ENCINO': [
-            r'\bENCINO\b'
-        ],
-        'PÁRAMO': [
-            r'\bPARAMO\b',
-            r'\bPÁRAMO\b'
-        ]
-    }
+    full_name = ' '.join(full_name_parts)
     
-    # Municipios de la Provincia de Socorro (Santander)
-    socorro_municipalities = {
-        'SOCORRO': [
-            r'\bSOCORRO\b',
-            r'\bSCORRO\b',
-            r'\bSOCORO\b'
-        ],
-        'CONFINES': [
-            r'\bCONFINES\b'
-        ],
-        'CONTRATACIÓN': [
-            r'\bCONTRATACION\b',
-            r'\bCONTRATACIÓN\b'
-        ],
-        'CHIMA': [
-            r'\bCHIMA\b'
-        ],
-        'GALÁN': [
-            r'\bGALAN\b',
-            r'\bGALÁN\b'
-        ],
-        'GAMBITA': [
-            r'\bGAMBITA\b'
-        ],
-        'GUAPOTÁ': [
-            r'\bGUAPOTA\b',
-            r'\bGUAPOTÁ\b'
-        ],
-        'JORDÁN': [
-            r'\bJORDAN\b',
-            r'\bJORDÁN\b'
-        ],
-        'OIBA': [
-            r'\bOIBA\b',
-            r'\bOYBA\b'
-        ],
-        'PALMAR': [
-            r'\bPALMAR\b'
-        ],
-        'SAN JOAQUÍN': [
-            r'\bSAN\s*JOAQUIN\b',
-            r'\bSAN\s*JOAQUÍN\b'
-        ],
-        'SIMACOTA': [
-            r'\bSIMACOTA\b'
-        ]
-    }
+    # Identificar zona
+    address = row.get('DIRECCION RESIDENCIA', '').strip()
+    # Si la dirección está vacía o tiene menos de 3 caracteres, colocar "NO ESPECIFICADA"
+    if not address or len(address) < 3:
+        address = 'NO ESPECIFICADA'
+    zona = identify_zone(address)
     
-    # Otras zonas importantes
-    other_zones = {
-        'VILLANUEVA': [
-            r'\bVILLANUEVA\b',
-            r'\bVILLA\s*NUEVA\b'
-        ],
-        'GUANE': [
-            r'\bGUANE\b'
-        ]
+    # Crear nueva fila
+    return {
+        'id': row.get('id', ''),
+        'external_id': row.get('external_id', ''),
+        'document': row.get('document', ''),
+        'full_name': full_name,
+        'TIPO SEXO': row.get('TIPO SEXO', ''),
+        'DIRECCION RESIDENCIA': address,
+        'zona': zona,
+        'TELEFONO RESIDENCIA': row.get('TELEFONO RESIDENCIA', ''),
+        'FECHA NACIMIENTO': row.get('FECHA NACIMIENTO', '')
     }
+
+def print_summary(output_file, rows_processed, zone_stats, examples, cache_hits, cache_misses):
+    """Mostrar resultado, distribución por zonas, caché y ejemplos"""
+    print(f"✅ Proceso completado exitosamente")
+    print(f"📊 Filas procesadas: {rows_processed}")
+    print(f"💾 Archivo generado: {output_file}")
     
-    # Buscar primero en municipios de San Gil
-    for municipality, patterns in san_gil_municipalities.items():
-        for pattern in patterns:
-            if re.search(pattern, addr_upper):
-                # Todos los municipios de San Gil se clasifican como "SAN GIL"
-                return "SAN GIL"
-    
-    # Buscar en municipios de Socorro
-    for municipality, patterns in socorro_municipalities.items():
-        for pattern in patterns:
-            if re.search(pattern, addr_upper):
-                # Todos los municipios de Socorro se clasifican como "SOCORRO"
-                return "SOCORRO"
-    
-    # Buscar en otras zonas
-    for zone, patterns in other_zones.items():
-        for pattern in patterns:
-            if re.search(pattern, addr_upper):
-                return zone
+    # Mostrar estadísticas de zonas
+    print("\n📍 Distribución por zonas:")
+    for zone, count in sorted(zone_stats.items(), key=lambda x: x[1], reverse=True):
+        percentage = (count / rows_processed) * 100
+        print(f"  {zone}: {count} ({percentage:.1f}%)")
     
-    # Si contiene "SANTANDER" pero no se identificó otra zona, puede ser general
-    if re.search(r'\bSANTANDER\b', addr_upper):
-        return "SANTANDER (OTRA)"
+    lookups = cache_hits + cache_misses
+    hit_rate = (cache_hits / lookups * 100) if lookups > 0 else 0
+    print(f"\n🧠 Caché de zonas: {cache_hits} aciertos | {cache_misses} fallos "
+          f"({hit_rate:.1f}% aciertos)")
     
-    return "NO ESPECIFICADA"
+    # Mostrar algunos ejemplos
+    print("\n📋 Ejemplos de registros reorganizados:")
+    for i, row in enumerate(examples[:5], 1):
+        print(f"  {i}. {row['full_name']} - Zona: {row['zona']}")
+        print(f"     Dirección: {row['DIRECCION RESIDENCIA'][:60]}...")
+
+def transform_rows(reader, zone_stats, examples):
+    """
+    Generador que transforma las filas una a una. Las estadísticas de zonas
+    y los primeros 5 ejemplos se acumulan en zone_stats y examples.
+    """
+    for row in reader:
+        new_row = build_output_row(row)
+        
+        # Estadísticas de zonas
+        zona = new_row['zona']
+        zone_stats[zona] = zone_stats.get(zona, 0) + 1
+        
+        if len(examples) < 5:
+            examples.append(new_row)
+        
+        yield new_row
 
 def reorganize_names(input_file, output_file):
     """
-    Lee el CSV original y reorganiza los nombres en una sola columna + zona
+    Lee el CSV original y reorganiza los nombres en una sola columna + zona.
+    Las filas se leen, transforman y escriben una a una (memoria constante).
     """
     try:
-        with open(input_file, 'r', encoding='iso-8859-1') as infile:
-            reader = csv.DictReader(infile)
-            
-            # Preparar nuevas columnas
-            fieldnames = ['id', 'external_id', 'document', 'full_name', 'TIPO SEXO', 
-                         'DIRECCION RESIDENCIA', 'zona', 'TELEFONO RESIDENCIA', 'FECHA NACIMIENTO']
-            
-            rows_processed = 0
-            rows_output = []
-            zone_stats = {}
-            
-            for row in reader:
-                # Obtener los componentes del nombre
-                nombres = row.get('NOMBRES', '').strip()
-                primer_apellido = row.get('PRIMER APELLIDO', '').strip()
-                segundo_apellido = row.get('SEGUNDO APELLIDO', '').strip()
-                
-                # Combinar en formato: NOMBRES PRIMER_APELLIDO SEGUNDO_APELLIDO
-                full_name_parts = []
-                if nombres:
-                    full_name_parts.append(nombres)
-                if primer_apellido:
-                    full_name_parts.append(primer_apellido)
-                if segundo_apellido:
-                    full_name_parts.append(segundo_apellido)
-                
-                full_name = ' '.join(full_name_parts)
-                
-                # Identificar zona
-                address = row.get('DIRECCION RESIDENCIA', '').strip()
-                # Si la dirección está vacía o tiene menos de 3 caracteres, colocar "NO ESPECIFICADA"
-                if not address or len(address) < 3:
-                    address = 'NO ESPECIFICADA'
-                zona = identify_zone(address)
-                
-                # Estadísticas de zonas
-                zone_stats[zona] = zone_stats.get(zona, 0) + 1
-                
-                # Crear nueva fila
-                new_row = {
-                    'id': row.get('id', ''),
-                    'external_id': row.get('external_id', ''),
-                    'document': row.get('document', ''),
-                    'full_name': full_name,
-                    'TIPO SEXO': row.get('TIPO SEXO', ''),
-                    'DIRECCION RESIDENCIA': address,
-                    'zona': zona,
-                    'TELEFONO RESIDENCIA': row.get('TELEFONO RESIDENCIA', ''),
-                    'FECHA NACIMIENTO': row.get('FECHA NACIMIENTO', '')
-                }
-                
-                rows_output.append(new_row)
-                rows_processed += 1
+        zone_stats = {}
+        examples = []
+        classify_normalized_address.cache_clear()
         
-        # Escribir el nuevo CSV
-        with open(output_file, 'w', encoding='utf-8', newline='') as outfile:
-            writer = csv.DictWriter(outfile, fieldnames=fieldnames)
+        with open(input_file, 'r', encoding='iso-8859-1') as infile, \
+                open(output_file, 'w', encoding='utf-8', newline='') as outfile:
+            reader = csv.DictReader(infile)
+            writer = csv.DictWriter(outfile, fieldnames=OUTPUT_FIELDNAMES)
             writer.writeheader()
-            writer.writerows(rows_output)
+            writer.writerows(transform_rows(reader, zone_stats, examples))
+        
+        rows_processed = sum(zone_stats.values())
+        cache_info = classify_normalized_address.cache_info()
+        print_summary(output_file, rows_processed, zone_stats, examples,
+                      cache_info.hits, cache_info.misses)
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error al procesar el archivo: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def find_chunk_boundaries(input_file, chunk_count):
+    """
+    Dividir el archivo en rangos de bytes alineados a inicio de registro.
+    Retorna (encabezado, lista de (inicio, fin)). Asume que los campos no
+    contienen saltos de línea (el export de DATABASE.csv no los tiene).
+    """
+    file_size = os.path.getsize(input_file)
+    
+    with open(input_file, 'rb') as infile:
+        header = infile.readline()
+        data_start = infile.tell()
         
-        print(f"✅ Proceso completado exitosamente")
-        print(f"📊 Filas procesadas: {rows_processed}")
-        print(f"💾 Archivo generado: {output_file}")
+        offsets = [data_start]
+        chunk_size = max(1, (file_size - data_start) // chunk_count)
+        for i in range(1, chunk_count):
+            infile.seek(data_start + i * chunk_size)
+            # Avanzar hasta el siguiente salto de línea para no partir un registro
+            infile.readline()
+            position = infile.tell()
+            if offsets[-1] < position < file_size:
+                offsets.append(position)
+        offsets.append(file_size)
+    
+    fieldnames = next(csv.reader([header.decode('iso-8859-1')]))
+    return fieldnames, list(zip(offsets[:-1], offsets[1:]))
+
+def process_chunk(task):
+    """
+    Procesar un rango de bytes del CSV en un proceso del pool. Las filas vuelven
+    ya escritas como texto CSV (más liviano de enviar que una lista de dicts).
+    Retorna (texto CSV, filas, primeros ejemplos, estadísticas de zonas,
+    aciertos y fallos de caché).
+    """
+    input_file, fieldnames, start, end = task
+    
+    with open(input_file, 'rb') as infile:
+        infile.seek(start)
+        data = infile.read(end - start).decode('iso-8859-1')
+    
+    before = classify_normalized_address.cache_info()
+    
+    output = io.StringIO(newline='')
+    writer = csv.DictWriter(output, fieldnames=OUTPUT_FIELDNAMES)
+    rows_count = 0
+    examples = []
+    zone_stats = {}
+    for row in csv.DictReader(io.StringIO(data, newline=''), fieldnames=fieldnames):
+        new_row = build_output_row(row)
+        zona = new_row['zona']
+        zone_stats[zona] = zone_stats.get(zona, 0) + 1
+        writer.writerow(new_row)
+        rows_count += 1
+        if len(examples) < 5:
+            examples.append(new_row)
+    del data
+    
+    after = classify_normalized_address.cache_info()
+    return output.getvalue(), rows_count, examples, zone_stats, after.hits - before.hits, after.misses - before.misses
+
+def reorganize_names_parallel(input_file, output_file, workers):
+    """
+    Igual que reorganize_names pero repartiendo bloques del archivo entre
+    varios procesos; los resultados se escriben en el orden original. Los
+    bloques miden alrededor de CHUNK_TARGET_BYTES y solo hay
+    CHUNKS_IN_FLIGHT_PER_WORKER por proceso a la vez, así la memoria no
+    depende del tamaño del archivo.
+    """
+    try:
+        chunk_count = max(workers * CHUNKS_PER_WORKER,
+                          -(-os.path.getsize(input_file) // CHUNK_TARGET_BYTES))
+        fieldnames, ranges = find_chunk_boundaries(input_file, chunk_count)
+        tasks = iter([(input_file, fieldnames, start, end) for start, end in ranges])
+        print(f"⚙️  {len(ranges)} bloques repartidos en {workers} procesos")
+        
+        rows_processed = 0
+        zone_stats = {}
+        examples = []
+        cache_hits = 0
+        cache_misses = 0
         
-        # Mostrar estadísticas de zonas
-        print("\n📍 Distribución por zonas:")
-        for zone, count in sorted(zone_stats.items(), key=lambda x: x[1], reverse=True):
-            percentage = (count / rows_processed) * 100
-            print(f"  {zone}: {count} ({percentage:.1f}%)")
+        with open(output_file, 'w', encoding='utf-8', newline='') as outfile:
+            writer = csv.DictWriter(outfile, fieldnames=OUTPUT_FIELDNAMES)
+            writer.writeheader()
+            
+            with Pool(processes=workers) as pool:
+                # Ventana de bloques pendientes, escritos en el orden original
+                pending = deque(pool.apply_async(process_chunk, (task,))
+                                for task in itertools.islice(tasks, workers * CHUNKS_IN_FLIGHT_PER_WORKER))
+                while pending:
+                    chunk_text, rows_count, chunk_examples, chunk_stats, hits, misses = pending.popleft().get()
+                    for task in itertools.islice(tasks, 1):
+                        pending.append(pool.apply_async(process_chunk, (task,)))
+                    
+                    outfile.write(chunk_text)
+                    rows_processed += rows_count
+                    for zona, count in chunk_stats.items():
+                        zone_stats[zona] = zone_stats.get(zona, 0) + count
+                    if len(examples) < 5:
+                        examples.extend(chunk_examples[:5 - len(examples)])
+                    cache_hits += hits
+                    cache_misses += misses
         
-        # Mostrar algunos ejemplos
-        print("\n📋 Ejemplos de registros reorganizados:")
-        for i, row in enumerate(rows_output[:5], 1):
-            print(f"  {i}. {row['full_name']} - Zona: {row['zona']}")
-            print(f"     Dirección: {row['DIRECCION RESIDENCIA'][:60]}...")
+        print_summary(output_file, rows_processed, zone_stats, examples, cache_hits, cache_misses)
         
         return True
         
@@ -298,14 +498,32 @@ def reorganize_names(input_file, output_file):
         traceback.print_exc()
         return False
 
+def parse_args():
+    """Leer argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Reorganizar nombres y clasificar zonas de DATABASE.csv")
+    parser.add_argument('input_file', nargs='?', default="/home/ubuntu/app/DATABASE.csv",
+                        help="CSV de entrada (por defecto: /home/ubuntu/app/DATABASE.csv)")
+    parser.add_argument('output_file', nargs='?', default="/home/ubuntu/app/DATABASE_reorganized.csv",
+                        help="CSV de salida (por defecto: /home/ubuntu/app/DATABASE_reorganized.csv)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Número de procesos para clasificar en paralelo (por defecto: 1)")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers debe ser mayor que 0")
+    return args
+
 if __name__ == "__main__":
-    input_file = "/home/ubuntu/app/DATABASE.csv"
-    output_file = "/home/ubuntu/app/DATABASE_reorganized.csv"
+    args = parse_args()
+    input_file = args.input_file
+    output_file = args.output_file
     
     print("🔄 Reorganizando nombres y clasificando zonas en el CSV...")
     print(f"📂 Archivo entrada: {input_file}")
     print(f"📂 Archivo salida: {output_file}")
     print()
     
-    success = reorganize_names(input_file, output_file)
+    if args.workers > 1:
+        success = reorganize_names_parallel(input_file, output_file, args.workers)
+    else:
+        success = reorganize_names(input_file, output_file)
     sys.exit(0 if success else 1)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Generador de datos sintéticos para medir los scripts de importación
+
+Produce archivos con la misma estructura que los exports reales: DATABASE.csv
+(con direcciones de Santander mal escritas o cortadas), socorro.csv, el CSV de
+pacientes que consume import_csv_to_patients.py, el texto extraído del PDF de
+CUPS y pacientes con nombres repetidos para analyze_duplicates.py. Con la misma
+semilla el resultado es siempre el mismo.
+"""
+
+import argparse
+import csv
+import os
+import random
+from datetime import datetime, timedelta
+
+FIRST_NAMES = ['MARIA', 'JOSE', 'LUIS', 'ANA', 'CARLOS', 'JUAN', 'LUZ', 'JORGE', 'MARTHA', 'PEDRO',
+               'GLORIA', 'DIANA', 'ANDRES', 'SANDRA', 'CLAUDIA', 'OSCAR', 'YOLANDA', 'JAVIER',
+               'ROSA', 'FABIO', 'GUILLERMO', 'XIMENA', 'YESICA', 'HERNANDO', 'BLANCA', 'CAMILO']
+LAST_NAMES = ['GOMEZ', 'RODRIGUEZ', 'PEREZ', 'MARTINEZ', 'GARCIA', 'LOPEZ', 'DIAZ', 'RUEDA',
+              'ARDILA', 'SILVA', 'PLATA', 'SANTOS', 'CALDERON', 'PORRAS', 'MANTILLA', 'ORTIZ',
+              'BALLESTEROS', 'VARGAS', 'QUINTERO', 'SUAREZ', 'BECERRA', 'CACERES', 'NIÑO', 'AVILA']
+
+# Direcciones de la región: bien escritas, mal escritas, cortadas y sin municipio
+ADDRESS_PLACES = ['SAN GIL', 'SAN GIL SANTANDER', 'SANGIL', 'S.GIL', 'SAN G', 'SAN GIL SATNADER',
+                  'SANTNADER', 'BARRIO LA GRUTA', 'FATIMA', 'SOCORRO', 'SOCORRO SANTANDER',
+                  'EL SOCORRO', 'SOCORO', 'BARICHARA', 'BARICHRA', 'CURITI', 'CURITÍ', 'CHARALA',
+                  'CHARALÁ', 'PINCHOTE', 'MOGOTES', 'ARATOCA', 'VILLANUEVA', 'VILLA NUEVA',
+                  'PARAMO', 'PÁRAMO', 'OIBA', 'SIMACOTA', 'GUANE', 'SANTANDER', 'BUCARAMANGA',
+                  'VEREDA EL CUCHARO', 'FINCA LA ESPERANZA', '']
+STREET_TYPES = ['CRA', 'CALLE', 'CL', 'KR', 'CARRERA', 'DIAG', 'TV']
+
+DOCUMENT_TYPES = ['CC', 'CC', 'CC', 'TI', 'RC', 'CE', 'PT', 'PS', 'NIT']
+
+CUPS_WORDS = ['CONSULTA', 'DE', 'PRIMERA', 'VEZ', 'POR', 'MEDICINA', 'GENERAL', 'ESPECIALIZADA',
+              'RADIOGRAFIA', 'TORAX', 'ECOGRAFIA', 'ABDOMEN', 'TOTAL', 'HEMOGRAMA', 'IV',
+              'GLUCOSA', 'EN', 'SUERO', 'U', 'OTRO', 'FLUIDO', 'RESONANCIA', 'MAGNETICA',
+              'CONTROL', 'SEGUIMIENTO', 'TERAPIA', 'FISICA', 'INTEGRAL', "D'ALEMBERT"]
+CUPS_PREFIXES = [87, 88, 89, 90, 91, 92, 93, 23, 19, 54]
+
+DATABASE_FIELDNAMES = ['id', 'external_id', 'document', 'PRIMER APELLIDO', 'SEGUNDO APELLIDO',
+                       'NOMBRES', 'TIPO SEXO', 'DIRECCION RESIDENCIA', 'TELEFONO RESIDENCIA',
+                       'FECHA NACIMIENTO']
+SOCORRO_FIELDNAMES = ['Tipo_Documento', 'Numero_Documento', 'Primer_Apellido', 'Segundo_Apellido',
+                      'Primer_Nombre', 'Segundo_Nombre', 'Fecha_Nacimiento', 'Genero']
+PATIENTS_FIELDNAMES = ['id', 'external_id', 'document', 'full_name', 'TIPO SEXO',
+                       'DIRECCION RESIDENCIA', 'zona', 'TELEFONO RESIDENCIA', 'FECHA NACIMIENTO',
+                       'insurance_eps_id']
+
+def random_address(rng):
+    """Dirección con nomenclatura urbana o rural y municipio posiblemente mal escrito"""
+    place = rng.choice(ADDRESS_PLACES)
+    if rng.random() < 0.05:
+        return rng.choice(['', 'NA', '.', place])
+    street = f"{rng.choice(STREET_TYPES)} {rng.randint(1, 40)} # {rng.randint(1, 60)}-{rng.randint(1, 99)}"
+    if rng.random() < 0.15:
+        street = street.lower()
+    return f"{street} {place}".strip()
+
+def random_birth_date(rng, style):
+    """Fecha de nacimiento en el formato del export, con una fracción de valores inválidos"""
+    roll = rng.random()
+    if roll < 0.02:
+        return ''
+    if roll < 0.03:
+        return rng.choice(['NULL', '31/02/1980', '00/00/0000', '1980-13-01', 'SIN DATO'])
+    year = rng.randint(1930, 2023)
+    month = rng.randint(1, 12)
+    day = rng.randint(1, 28)
+    if style == 'socorro':
+        separator = '/' if rng.random() < 0.8 else '-'
+        return f"{year}{separator}{month:02d}{separator}{day:02d}"
+    if rng.random() < 0.1:
+        return f"{day}/{month}/{year % 100:02d}"
+    return f"{day:02d}/{month:02d}/{year}"
+
+def write_database_csv(path, rows, seed=0):
+    """CSV con la estructura de DATABASE.csv (iso-8859-1, como el export original)"""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='iso-8859-1', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=DATABASE_FIELDNAMES)
+        writer.writeheader()
+        for index in range(1, rows + 1):
+            writer.writerow({
+                'id': index,
+                'external_id': f"EXT{index:08d}",
+                'document': str(rng.randint(1000000, 1199999999)) if rng.random() > 0.01 else '',
+                'PRIMER APELLIDO': rng.choice(LAST_NAMES),
+                'SEGUNDO APELLIDO': rng.choice(LAST_NAMES) if rng.random() > 0.1 else '',
+                'NOMBRES': ' '.join(rng.sample(FIRST_NAMES, rng.choice([1, 1, 2]))),
+                'TIPO SEXO': rng.choice(['M', 'F', 'F', 'M', ' f', '']),
+                'DIRECCION RESIDENCIA': random_address(rng),
+                'TELEFONO RESIDENCIA': str(rng.randint(3000000000, 3219999999)) if rng.random() > 0.2 else '',
+                'FECHA NACIMIENTO': random_birth_date(rng, 'database'),
+            })
+    return path
+
+def write_socorro_csv(path, rows, seed=0):
+    """CSV con las columnas de socorro.csv (NULL como valor ausente, fechas YYYY/MM/DD)"""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8-sig', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=SOCORRO_FIELDNAMES)
+        writer.writeheader()
+        for _ in range(rows):
+            writer.writerow({
+                'Tipo_Documento': rng.choice(DOCUMENT_TYPES),
+                'Numero_Documento': str(rng.randint(1000000, 1199999999)) if rng.random() > 0.005 else '',
+                'Primer_Apellido': rng.choice(LAST_NAMES),
+                'Segundo_Apellido': rng.choice(LAST_NAMES) if rng.random() > 0.1 else 'NULL',
+                'Primer_Nombre': rng.choice(FIRST_NAMES),
+                'Segundo_Nombre': rng.choice(FIRST_NAMES) if rng.random() > 0.5 else 'NULL',
+                'Fecha_Nacimiento': random_birth_date(rng, 'socorro'),
+                'Genero': rng.choice(['M', 'F', '']),
+            })
+    return path
+
+def write_patients_csv(path, rows, seed=0):
+    """CSV con la estructura de san_gil.csv que consume import_csv_to_patients.py"""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=PATIENTS_FIELDNAMES)
+        writer.writeheader()
+        for index in range(1, rows + 1):
+            writer.writerow({
+                'id': index,
+                'external_id': f"EXT{index:08d}",
+                'document': str(rng.randint(1000000, 1199999999)) if rng.random() > 0.01 else '',
+                'full_name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}",
+                'TIPO SEXO': rng.choice(['M', 'F', '']),
+                'DIRECCION RESIDENCIA': random_address(rng),
+                'zona': '4',
+                'TELEFONO RESIDENCIA': str(rng.randint(3000000000, 3219999999)),
+                'FECHA NACIMIENTO': random_birth_date(rng, 'database'),
+                'insurance_eps_id': '12',
+            })
+    return path
+
+def write_cups_text(path, records, seed=0):
+    """
+    Texto como el que produce pdftotext sobre el PDF de CUPS: encabezados por
+    página, nombres partidos en varias líneas, códigos repetidos con otro precio
+    y registros sin precio.
+    """
+    rng = random.Random(seed)
+    codes = [f"{rng.choice(CUPS_PREFIXES)}{rng.randint(0, 9999):04d}" for _ in range(max(records * 9 // 10, 1))]
+    with open(path, 'w', encoding='utf-8') as file:
+        for index in range(records):
+            if index % 40 == 0:
+                file.write("Codigo CUPS NombreCUPS\n\nMonto\n\n")
+            code = codes[index] if index < len(codes) else rng.choice(codes)
+            words = [rng.choice(CUPS_WORDS) for _ in range(rng.randint(2, 14))]
+            split = len(words) if len(words) < 8 or rng.random() < 0.5 else rng.randint(4, len(words) - 1)
+            file.write(f"{code} {' '.join(words[:split])}\n")
+            if split < len(words):
+                file.write(' '.join(words[split:]) + '\n')
+            if rng.random() < 0.97:
+                file.write(f"\n{rng.randint(5, 2500) * 100}\n")
+            file.write('\n')
+    return path
+
+def generate_duplicate_candidates(rows, seed=0):
+    """
+    Pacientes como los devuelve get_duplicates(): dict por fila, ordenados por
+    nombre, con grupos de 2 a 4 registros que comparten nombre.
+    """
+    rng = random.Random(seed)
+    base = datetime(2023, 1, 1)
+    patients = []
+    while len(patients) < rows:
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+        document = str(rng.randint(1000000, 1199999999))
+        for _ in range(min(rng.randint(2, 4), rows - len(patients))):
+            patients.append({
+                'id': len(patients) + 1,
+                'name': name,
+                'document': document[:rng.randint(6, len(document))],
+                'phone': str(rng.randint(3000000000, 3219999999)) if rng.random() > 0.3 else '',
+                'email': None,
+                'birth_date': None,
+                'gender': rng.choice(['Masculino', 'Femenino']),
+                'address': random_address(rng) if rng.random() > 0.2 else '',
+                'eps_name': 'NUEVA EPS',
+                'created_at': base + timedelta(minutes=rng.randint(0, 500000)),
+                'zone_name': 'San Gil',
+                'total_duplicados': 0,
+            })
+    patients.sort(key=lambda p: (p['name'], p['created_at']))
+    return patients
+
+GENERATORS = {
+    'database': (write_database_csv, 'DATABASE_{rows}.csv'),
+    'socorro': (write_socorro_csv, 'socorro_{rows}.csv'),
+    'patients': (write_patients_csv, 'san_gil_{rows}.csv'),
+    'cups': (write_cups_text, 'cups_data_{rows}.txt'),
+}
+
+def parse_args():
+    """Leer argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Generar archivos sintéticos con la estructura de los exports reales")
+    parser.add_argument('kind', choices=sorted(GENERATORS), help="Tipo de archivo a generar")
+    parser.add_argument('rows', type=int, help="Cantidad de filas (registros CUPS para 'cups')")
+    parser.add_argument('--output-dir', default='.', help="Directorio de salida (por defecto: actual)")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla del generador (por defecto: 0)")
+    args = parser.parse_args()
+    if args.rows < 1:
+        parser.error("rows debe ser mayor que 0")
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
+    writer, pattern = GENERATORS[args.kind]
+    path = writer(os.path.join(args.output_dir, pattern.format(rows=args.rows)), args.rows, args.seed)
+    print(f"✅ Archivo generado: {path}")
@@ -4,30 +4,15 @@ Script para actualizar la base de datos MySQL con los datos reorganizados del CS
 incluyendo la columna de zona geográfica
 """
 
+import argparse
 import csv
-import mysql.connector
 from mysql.connector import Error
 import sys
 
-# Configuración de la base de datos
-DB_CONFIG = {
-    'host': '127.0.0.1',
-    'port': 3306,
-    'user': 'biosanar_user',
-    'password': '/6Tx0eXqFQONTFuoc7aqPicNlPhmuINU',
-    'database': 'biosanar'
-}
-
-def connect_db():
-    """Conectar a la base de datos"""
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        if conn.is_connected():
-            print("✅ Conexión exitosa a la base de datos")
-            return conn
-    except Error as e:
-        print(f"❌ Error al conectar a la base de datos: {e}")
-        return None
+from db import DB_CONFIG, connect_db, execute_batches, prepared_cursor
+
+# Filas por INSERT multi-fila al cargar la tabla temporal
+STAGING_BATCH_SIZE = 1000
 
 def add_zone_column(cursor):
     """Agregar columna 'zona' a la tabla patients_cp si no existe"""
@@ -36,7 +21,7 @@ def add_zone_column(cursor):
         cursor.execute("""
             SELECT COUNT(*) 
             FROM INFORMATION_SCHEMA.COLUMNS 
-            WHERE TABLE_SCHEMA = 'biosanar' 
+            WHERE TABLE_SCHEMA = DATABASE() 
             AND TABLE_NAME = 'patients_cp' 
             AND COLUMN_NAME = 'zona'
         """)
@@ -57,19 +42,35 @@ def add_zone_column(cursor):
         print(f"❌ Error al agregar columna zona: {e}")
         return False
 
+ZONE_UPDATE_SQL = """
+    UPDATE patients_cp 
+    SET zona = %s 
+    WHERE document = %s
+"""
+
 def update_patient_zone(cursor, document, zona):
     """Actualizar la zona de un paciente basado en el documento"""
     try:
-        cursor.execute("""
-            UPDATE patients_cp 
-            SET zona = %s 
-            WHERE document = %s
-        """, (zona, document))
+        cursor.execute(ZONE_UPDATE_SQL, (zona, document))
         return cursor.rowcount
     except Error as e:
         print(f"❌ Error al actualizar paciente {document}: {e}")
         return 0
 
+def print_zone_distribution(cursor, updated_count):
+    """Mostrar estadísticas de zonas en la BD"""
+    print("\n📍 Distribución de zonas en la base de datos:")
+    cursor.execute("""
+        SELECT zona, COUNT(*) as total 
+        FROM patients_cp 
+        GROUP BY zona 
+        ORDER BY total DESC
+    """)
+    
+    for zona, count in cursor.fetchall():
+        percentage = (count / updated_count * 100) if updated_count > 0 else 0
+        print(f"   {zona}: {count} ({percentage:.1f}%)")
+
 def process_csv_and_update(csv_file, conn):
     """Procesar el CSV y actualizar la base de datos"""
     cursor = conn.cursor()
@@ -88,6 +89,9 @@ def process_csv_and_update(csv_file, conn):
             not_found_count = 0
             total_count = 0
             
+            # UPDATE por fila preparado una sola vez en el servidor
+            update_cursor = prepared_cursor(conn, ZONE_UPDATE_SQL)
+            
             print("\n🔄 Actualizando zonas en la base de datos...")
             
             for row in reader:
@@ -98,7 +102,7 @@ def process_csv_and_update(csv_file, conn):
                 if not document:
                     continue
                 
-                rows_affected = update_patient_zone(cursor, document, zona)
+                rows_affected = update_patient_zone(update_cursor, document, zona)
                 
                 if rows_affected > 0:
                     updated_count += rows_affected
@@ -118,18 +122,7 @@ def process_csv_and_update(csv_file, conn):
             print(f"   ✅ Pacientes actualizados: {updated_count}")
             print(f"   ⚠️  No encontrados en BD: {not_found_count}")
             
-            # Mostrar estadísticas de zonas en la BD
-            print("\n📍 Distribución de zonas en la base de datos:")
-            cursor.execute("""
-                SELECT zona, COUNT(*) as total 
-                FROM patients_cp 
-                GROUP BY zona 
-                ORDER BY total DESC
-            """)
-            
-            for zona, count in cursor.fetchall():
-                percentage = (count / updated_count * 100) if updated_count > 0 else 0
-                print(f"   {zona}: {count} ({percentage:.1f}%)")
+            print_zone_distribution(cursor, updated_count)
             
             return True
             
@@ -141,8 +134,130 @@ def process_csv_and_update(csv_file, conn):
     finally:
         cursor.close()
 
+ZONE_STAGING_INSERT = """
+    INSERT INTO tmp_patient_zones (document, zona)
+    VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE zona = VALUES(zona)
+"""
+
+def create_zone_staging(cursor):
+    """
+    Crear (vacía) la tabla temporal tmp_patient_zones con los tipos de columna
+    de patients_cp (CREATE ... SELECT LIMIT 0): mismo ancho, para no truncar,
+    y misma collation, para que el JOIN por document no mezcle collations.
+    Requiere la columna zona (add_zone_column).
+    """
+    cursor.execute("DROP TEMPORARY TABLE IF EXISTS tmp_patient_zones")
+    cursor.execute("""
+        CREATE TEMPORARY TABLE tmp_patient_zones (
+            PRIMARY KEY (document)
+        )
+        SELECT document, zona
+        FROM patients_cp
+        LIMIT 0
+    """)
+
+def load_zone_staging(cursor, csv_file):
+    """
+    Cargar los pares (document, zona) del CSV en la tabla temporal tmp_patient_zones
+    con INSERT multi-fila. Un documento repetido conserva la última zona del CSV.
+    Retorna el total de registros leídos del CSV.
+    """
+    create_zone_staging(cursor)
+    
+    total_count = 0
+    
+    def zone_pairs(reader):
+        nonlocal total_count
+        for row in reader:
+            total_count += 1
+            document = row.get('document', '').strip()
+            zona = row.get('zona', 'NO ESPECIFICADA').strip()
+            
+            if document:
+                yield (document, zona)
+    
+    with open(csv_file, 'r', encoding='utf-8') as file:
+        reader = csv.DictReader(file)
+        execute_batches(cursor, ZONE_STAGING_INSERT, zone_pairs(reader), STAGING_BATCH_SIZE,
+                        on_batch=lambda sent: print(f"   Cargados en tabla temporal: {total_count}", end='\r'))
+    
+    return total_count
+
+def apply_zone_staging(cursor):
+    """
+    Copiar las zonas de tmp_patient_zones a patients_cp con un único UPDATE ... JOIN
+    y eliminar la tabla temporal. Retorna (actualizados, no encontrados en BD).
+    """
+    cursor.execute("""
+        SELECT COUNT(*)
+        FROM tmp_patient_zones t
+        LEFT JOIN patients_cp p ON p.document = t.document
+        WHERE p.document IS NULL
+    """)
+    not_found_count = cursor.fetchone()[0]
+    
+    cursor.execute("""
+        UPDATE patients_cp p
+        JOIN tmp_patient_zones t USING (document)
+        SET p.zona = t.zona
+    """)
+    updated_count = cursor.rowcount
+    
+    cursor.execute("DROP TEMPORARY TABLE IF EXISTS tmp_patient_zones")
+    return updated_count, not_found_count
+
+def process_csv_set_based(csv_file, conn):
+    """
+    Actualizar las zonas con una sola sentencia UPDATE ... JOIN contra una
+    tabla temporal, en lugar de un UPDATE por fila del CSV
+    """
+    cursor = conn.cursor()
+    
+    # Agregar columna zona si no existe
+    if not add_zone_column(cursor):
+        return False
+    
+    conn.commit()
+    
+    try:
+        print("\n🔄 Cargando documentos y zonas en tabla temporal...")
+        total_count = load_zone_staging(cursor, csv_file)
+        
+        print("\n🔄 Actualizando zonas en la base de datos...")
+        updated_count, not_found_count = apply_zone_staging(cursor)
+        conn.commit()
+        
+        print(f"\n✅ Proceso completado:")
+        print(f"   📊 Total de registros en CSV: {total_count}")
+        print(f"   ✅ Pacientes actualizados: {updated_count}")
+        print(f"   ⚠️  No encontrados en BD: {not_found_count}")
+        
+        print_zone_distribution(cursor, updated_count)
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error al procesar el CSV: {e}")
+        import traceback
+        traceback.print_exc()
+        conn.rollback()
+        return False
+    finally:
+        cursor.close()
+
+def parse_args():
+    """Leer argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Actualizar la zona de patients_cp desde el CSV reorganizado")
+    parser.add_argument('csv_file', nargs='?', default="/home/ubuntu/app/DATABASE_reorganized.csv",
+                        help="CSV con columnas document y zona (por defecto: /home/ubuntu/app/DATABASE_reorganized.csv)")
+    parser.add_argument('--set-based', action='store_true',
+                        help="Cargar el CSV en una tabla temporal y actualizar con un único UPDATE ... JOIN")
+    return parser.parse_args()
+
 def main():
-    csv_file = "/home/ubuntu/app/DATABASE_reorganized.csv"
+    args = parse_args()
+    csv_file = args.csv_file
     
     print("🔄 Actualizando base de datos con zonas desde CSV...")
     print(f"📂 Archivo CSV: {csv_file}")
@@ -155,7 +270,10 @@ def main():
         sys.exit(1)
     
     # Procesar y actualizar
-    success = process_csv_and_update(csv_file, conn)
+    if args.set_based:
+        success = process_csv_set_based(csv_file, conn)
+    else:
+        success = process_csv_and_update(csv_file, conn)
     
     # Cerrar conexión
     conn.close()
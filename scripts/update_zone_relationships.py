@@ -3,46 +3,26 @@
 Script para actualizar zone_id en patients_cp basado en la columna zona
 """
 
-import mysql.connector
-from mysql.connector import Error
 import sys
 
-# Configuración de la base de datos
-DB_CONFIG = {
-    'host': '127.0.0.1',
-    'port': 3306,
-    'user': 'biosanar_user',
-    'password': '/6Tx0eXqFQONTFuoc7aqPicNlPhmuINU',
-    'database': 'biosanar'
-}
+from db import DB_CONFIG, connect_db
 
-def connect_db():
-    """Conectar a la base de datos"""
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        if conn.is_connected():
-            print("✅ Conexión exitosa a la base de datos")
-            return conn
-    except Error as e:
-        print(f"❌ Error al conectar a la base de datos: {e}")
-        return None
+# Mapeo de nombres de zona a zone_id
+ZONE_MAPPING = {
+    'SAN GIL': 4,  # Zona San Gil
+    'SOCORRO': 3,  # Zona de Socorro
+}
 
 def update_zone_relationships(conn):
     """Actualizar zone_id en patients_cp basado en la columna zona"""
     cursor = conn.cursor()
     
     try:
-        # Mapeo de nombres de zona a zone_id
-        zone_mapping = {
-            'SAN GIL': 4,  # Zona San Gil
-            'SOCORRO': 3,  # Zona de Socorro
-        }
-        
         total_updated = 0
         
         print("\n🔄 Actualizando relaciones zone_id en patients_cp...")
         
-        for zona_name, zone_id in zone_mapping.items():
+        for zona_name, zone_id in ZONE_MAPPING.items():
             # Actualizar zone_id basado en el valor de la columna zona
             cursor.execute("""
                 UPDATE patients_cp 
@@ -3,43 +3,80 @@
 Script para verificar qué pacientes del CSV ya están en patients_cp
 """
 
+import argparse
 import csv
-import mysql.connector
-from mysql.connector import Error
 
-# Configuración de la base de datos
-DB_CONFIG = {
-    'host': '127.0.0.1',
-    'port': 3306,
-    'user': 'biosanar_user',
-    'password': '/6Tx0eXqFQONTFuoc7aqPicNlPhmuINU',
-    'database': 'biosanar'
-}
+from db import connect_db
 
-def connect_db():
-    """Conectar a la base de datos"""
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        if conn.is_connected():
-            print("✅ Conexión exitosa a la base de datos")
-            return conn
-    except Error as e:
-        print(f"❌ Error al conectar a la base de datos: {e}")
-        return None
+# Documentos por consulta WHERE document IN (...)
+LOOKUP_BATCH_SIZE = 2000
+
+def fetch_patients_by_document(cursor, documents):
+    """Buscar un lote de documentos con una sola consulta IN (...)"""
+    placeholders = ', '.join(['%s'] * len(documents))
+    cursor.execute(f"""
+        SELECT id, document, name, zone_id 
+        FROM patients_cp 
+        WHERE document IN ({placeholders})
+    """, list(documents))
+    
+    patients = {}
+    for patient_id, db_document, db_name, zone_id in cursor.fetchall():
+        patients.setdefault(db_document.upper(), (patient_id, db_name, zone_id))
+    return patients
+
+def fetch_all_patients(cursor):
+    """Cargar una sola vez todos los documentos de patients_cp en memoria"""
+    cursor.execute("SELECT id, document, name, zone_id FROM patients_cp")
+    
+    patients = {}
+    for patient_id, db_document, db_name, zone_id in cursor:
+        patients.setdefault(db_document.upper(), (patient_id, db_name, zone_id))
+    return patients
+
+def resolve_batch(batch, patients, found_documents, not_found_documents):
+    """Clasificar un lote (document, full_name) en encontrados y no encontrados, en orden"""
+    for document, full_name in batch:
+        # La colación de la columna no distingue mayúsculas
+        result = patients.get(document.upper())
+        
+        if result:
+            patient_id, db_name, zone_id = result
+            found_documents.append({
+                'document': document,
+                'csv_name': full_name,
+                'db_name': db_name,
+                'zone_id': zone_id,
+                'patient_id': patient_id
+            })
+        else:
+            not_found_documents.append({
+                'document': document,
+                'name': full_name
+            })
 
-def verify_patients(csv_file, conn):
-    """Verificar qué pacientes del CSV están en la BD"""
+def verify_patients(csv_file, conn, batch_size=LOOKUP_BATCH_SIZE, snapshot=False):
+    """
+    Verificar qué pacientes del CSV están en la BD.
+    Los documentos se resuelven por lotes con WHERE document IN (...), o
+    contra una copia en memoria de patients_cp si snapshot es True.
+    """
     cursor = conn.cursor()
     
     try:
+        all_patients = None
+        if snapshot:
+            print("\n📥 Cargando documentos de patients_cp en memoria...")
+            all_patients = fetch_all_patients(cursor)
+            print(f"   {len(all_patients)} documentos cargados")
+        
         with open(csv_file, 'r', encoding='utf-8') as file:
             reader = csv.DictReader(file)
             
             total_csv = 0
-            found_in_db = 0
-            not_found = 0
             found_documents = []
             not_found_documents = []
+            batch = []
             
             print("\n🔍 Verificando pacientes del CSV en la base de datos...\n")
             
@@ -51,31 +88,18 @@ def verify_patients(csv_file, conn):
                 if not document:
                     continue
                 
-                # Buscar el documento en la BD
-                cursor.execute("""
-                    SELECT id, document, name, zone_id 
-                    FROM patients_cp 
-                    WHERE document = %s
-                """, (document,))
-                
-                result = cursor.fetchone()
-                
-                if result:
-                    found_in_db += 1
-                    patient_id, db_document, db_name, zone_id = result
-                    found_documents.append({
-                        'document': document,
-                        'csv_name': full_name,
-                        'db_name': db_name,
-                        'zone_id': zone_id,
-                        'patient_id': patient_id
-                    })
-                else:
-                    not_found += 1
-                    not_found_documents.append({
-                        'document': document,
-                        'name': full_name
-                    })
+                batch.append((document, full_name))
+                if len(batch) >= batch_size:
+                    patients = all_patients if snapshot else fetch_patients_by_document(cursor, {doc for doc, _ in batch})
+                    resolve_batch(batch, patients, found_documents, not_found_documents)
+                    batch = []
+            
+            if batch:
+                patients = all_patients if snapshot else fetch_patients_by_document(cursor, {doc for doc, _ in batch})
+                resolve_batch(batch, patients, found_documents, not_found_documents)
+            
+            found_in_db = len(found_documents)
+            not_found = len(not_found_documents)
             
             # Mostrar estadísticas
             print(f"📊 ESTADÍSTICAS:")
@@ -120,8 +144,23 @@ def verify_patients(csv_file, conn):
     finally:
         cursor.close()
 
+def parse_args():
+    """Leer argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Verificar qué pacientes del CSV ya están en patients_cp")
+    parser.add_argument('csv_file', nargs='?', default="/home/ubuntu/app/san_gil.csv",
+                        help="Archivo CSV a verificar (por defecto: /home/ubuntu/app/san_gil.csv)")
+    parser.add_argument('--batch-size', type=int, default=LOOKUP_BATCH_SIZE,
+                        help=f"Documentos por consulta IN (...) (por defecto: {LOOKUP_BATCH_SIZE})")
+    parser.add_argument('--snapshot', action='store_true',
+                        help="Cargar todos los documentos de patients_cp en memoria y comparar localmente")
+    args = parser.parse_args()
+    if args.batch_size < 1:
+        parser.error("--batch-size debe ser mayor que 0")
+    return args
+
 def main():
-    csv_file = "/home/ubuntu/app/san_gil.csv"
+    args = parse_args()
+    csv_file = args.csv_file
     
     print("🔄 Verificando pacientes del CSV en la base de datos...")
     print(f"📂 Archivo CSV: {csv_file}")
@@ -131,7 +170,7 @@ def main():
     if not conn:
         return 1
     
-    success = verify_patients(csv_file, conn)
+    success = verify_patients(csv_file, conn, batch_size=args.batch_size, snapshot=args.snapshot)
     
     conn.close()
     print("\n🔒 Conexión cerrada")